@@ -1,8 +1,35 @@
+import math
 import sqlite3
-import random
+from itertools import islice
+import numpy as np
+from utils.db_init import tune_connection
 
-# Connect to database
-conn = sqlite3.connect('data/tradecraft.db')
+# Re-count tagged trades from trade_tags after writing (debug aid)
+VERIFY = False
+
+# Seed for the random generator; set an int for reproducible sampling and tags
+SEED = None
+
+
+def reservoir_sample(items, k, rng):
+    """Uniformly sample k items from an iterable in one pass (Algorithm L)."""
+    items = iter(items)
+    reservoir = list(islice(items, k))
+    if len(reservoir) < k:
+        return reservoir
+    w = math.exp(math.log(rng.random()) / k)
+    while True:
+        # Skip a geometrically distributed number of items before the next replacement
+        skip = math.floor(math.log(rng.random()) / math.log(1 - w))
+        item = next(islice(items, skip, None), None)
+        if item is None:
+            return reservoir
+        reservoir[rng.integers(k)] = item
+        w *= math.exp(math.log(rng.random()) / k)
+
+
+# Connect to database in autocommit mode; the tag writes below run in one explicit transaction
+conn = tune_connection(sqlite3.connect('data/tradecraft.db', isolation_level=None))
 cursor = conn.cursor()
 
 # Sample tags to add
@@ -12,29 +39,56 @@ sample_tags = [
     'resistance-break', 'trend-following', 'contrarian', 'scalp', 'position'
 ]
 
-# Get first 50 trades to add tags to
-cursor.execute("SELECT id FROM trades LIMIT 50")
-trade_ids = [row[0] for row in cursor.fetchall()]
-
-# Add random tags to trades
-for trade_id in trade_ids:
-    # Random number of tags (1-3 per trade)
-    num_tags = random.randint(1, 3)
-    selected_tags = random.sample(sample_tags, num_tags)
-    tags_string = ', '.join(selected_tags)
-    
-    cursor.execute("UPDATE trades SET tags = ? WHERE id = ?", (tags_string, trade_id))
-
-# Commit changes
-conn.commit()
-
-# Verify the update
-cursor.execute("SELECT COUNT(*) FROM trades WHERE tags IS NOT NULL AND tags != ''")
-tagged_count = cursor.fetchone()[0]
+rng = np.random.default_rng(SEED)
+
+# Pick 50 trades uniformly at random, streaming ids rather than fetching them all
+# (a dedicated cursor yields bare ids, so no per-row tuples are unpacked)
+id_cursor = conn.cursor()
+id_cursor.row_factory = lambda cur, row: row[0]
+trade_ids = reservoir_sample(id_cursor.execute("SELECT id FROM trades"), 50, rng)
+
+conn.execute("BEGIN IMMEDIATE")
+
+# Make sure every sample tag exists in the normalized tags table
+cursor.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(tag,) for tag in sample_tags])
+cursor.execute(
+    f"SELECT name, id FROM tags WHERE name IN ({', '.join('?' * len(sample_tags))})", sample_tags
+)
+tag_map = dict(cursor.fetchall())
+tag_ids = np.array([tag_map[tag] for tag in sample_tags])
+
+# Draw all tag counts (1-3 per trade) and per-trade tag permutations at once;
+# the first `count` columns of each shuffled row are that trade's tags.
+counts = rng.integers(1, 4, size=len(trade_ids))
+order = np.argsort(rng.random((len(trade_ids), len(sample_tags))), axis=1)
+rows = [
+    (trade_id, int(tag_id))
+    for i, (trade_id, count) in enumerate(zip(trade_ids, counts))
+    for tag_id in tag_ids[order[i, :count]]
+]
+
+# Replace the sampled trades' tags in the same transaction
+cursor.executemany("DELETE FROM trade_tags WHERE trade_id = ?", [(trade_id,) for trade_id in trade_ids])
+cursor.executemany("INSERT INTO trade_tags (trade_id, tag_id) VALUES (?, ?)", rows)
+conn.execute("COMMIT")
+
+# We just tagged a known set of trades, so only scan the table when asked to
+tagged_count = len(trade_ids)
+if VERIFY:
+    cursor.execute("SELECT COUNT(DISTINCT trade_id) FROM trade_tags")
+    tagged_count = cursor.fetchone()[0]
 print(f"Successfully added tags to {tagged_count} trades")
 
 # Show sample tagged trades
-cursor.execute("SELECT id, asset_symbol, tags FROM trades WHERE tags IS NOT NULL AND tags != '' LIMIT 10")
+sample_ids = trade_ids[:10]
+cursor.execute(f"""
+    SELECT t.id, t.asset_symbol, GROUP_CONCAT(tags.name, ', ')
+    FROM trades t
+    JOIN trade_tags tt ON tt.trade_id = t.id
+    JOIN tags ON tags.id = tt.tag_id
+    WHERE t.id IN ({', '.join('?' * len(sample_ids))})
+    GROUP BY t.id
+""", sample_ids)
 sample_trades = cursor.fetchall()
 print("\nSample tagged trades:")
 for trade in sample_trades:
@@ -5,14 +5,31 @@ Add sample trades for a specific user account.
 
 import sqlite3
 from pathlib import Path
-from datetime import datetime, timedelta
-import random
+from typing import Optional
+import numpy as np
+import pandas as pd
+from utils.db_init import tune_connection
 
-def add_sample_trades_for_user(username: str, num_trades: int = 10):
-    """Add sample trades for a specific user."""
+# Multi-row insert; {values} is filled with one "(?, ...)" group per trade
+TRADE_SQL = """
+    INSERT INTO trades (user_id, account_id, asset_symbol, asset_type, opened_at, closed_at, notes, tags, created_at, updated_at)
+    VALUES {values}
+    RETURNING id
+"""
+TRADE_VALUES = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+TRADE_CHUNK = 99  # 10 params per row keeps each statement under SQLite's default 999 limit
+
+LEG_SQL = """
+    INSERT INTO trade_legs (trade_id, action, quantity, price, fees, executed_at, notes, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def add_sample_trades_for_user(username: str, num_trades: int = 10, seed: Optional[int] = None):
+    """Add sample trades for a specific user (pass a seed for reproducible data)."""
     db_path = Path('data/tradecraft.db')
     
-    with sqlite3.connect(db_path) as conn:
+    # Autocommit mode: the bulk insert below manages its own transaction
+    with tune_connection(sqlite3.connect(db_path, isolation_level=None)) as conn:
         cursor = conn.cursor()
         
         # Get user and account info
@@ -34,53 +51,71 @@ def add_sample_trades_for_user(username: str, num_trades: int = 10):
         
         # Sample symbols and data
         symbols = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "META", "AMZN"]
-        now = datetime.now()
+        rng = np.random.default_rng(seed)
+        now = pd.Timestamp.now()
+        now_iso = now.isoformat()
         
-        for i in range(num_trades):
-            # Random trade data
-            symbol = random.choice(symbols)
-            trade_date = now - timedelta(days=random.randint(1, 90))
-            close_date = trade_date + timedelta(hours=random.randint(1, 48))
-            
-            entry_price = random.uniform(50, 300)
-            is_profitable = random.random() < 0.6  # 60% win rate
-            exit_price = entry_price * (1 + random.uniform(0.01, 0.15)) if is_profitable else entry_price * (1 - random.uniform(0.01, 0.10))
-            
-            quantity = random.randint(10, 100)
-            notes = f"Sample trade #{i+1} for {symbol}"
-            tags = random.choice(["momentum", "swing", "earnings", "technical"])
-            
-            # Insert trade
-            cursor.execute("""
-                INSERT INTO trades (user_id, account_id, asset_symbol, asset_type, opened_at, closed_at, notes, tags, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user_id, account_id, symbol, "stock", 
-                trade_date.isoformat(), close_date.isoformat(), 
-                notes, tags, now.isoformat(), now.isoformat()
-            ))
-            
-            trade_id = cursor.lastrowid
-            
-            # Insert buy leg
-            cursor.execute("""
-                INSERT INTO trade_legs (trade_id, action, quantity, price, fees, executed_at, notes, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                trade_id, "buy", quantity, entry_price, round(random.uniform(0.5, 2.0), 2),
-                trade_date.isoformat(), "Entry", now.isoformat(), now.isoformat()
+        # Open 1-90 days ago, close 1-48 hours later; formatted in one pass
+        trade_dates = now - pd.to_timedelta(rng.integers(1, 91, num_trades), unit='D')
+        close_dates = trade_dates + pd.to_timedelta(rng.integers(1, 49, num_trades), unit='h')
+        opened_iso = trade_dates.strftime('%Y-%m-%dT%H:%M:%S.%f').tolist()
+        closed_iso = close_dates.strftime('%Y-%m-%dT%H:%M:%S.%f').tolist()
+        
+        # Prices, quantities and fees for all trades in one draw each (60% win rate)
+        entry_prices = rng.uniform(50, 300, num_trades)
+        is_profitable = rng.random(num_trades) < 0.6
+        moves = np.where(is_profitable, rng.uniform(0.01, 0.15, num_trades), -rng.uniform(0.01, 0.10, num_trades))
+        exit_prices = entry_prices * (1 + moves)
+        quantities = rng.integers(10, 101, num_trades)
+        buy_fees = np.round(rng.uniform(0.5, 2.0, num_trades), 2)
+        sell_fees = np.round(rng.uniform(0.5, 2.0, num_trades), 2)
+        
+        # Symbols and legacy tags as int-coded draws into lookup arrays
+        symbols_arr = np.array(symbols)
+        tag_pool = np.array(["momentum", "swing", "earnings", "technical"])
+        trade_symbols = symbols_arr[rng.integers(0, len(symbols_arr), num_trades)].tolist()
+        trade_tags = tag_pool[rng.integers(0, len(tag_pool), num_trades)].tolist()
+        
+        trade_rows = [
+            (
+                user_id, account_id, symbol, "stock",
+                trade_date, close_date,
+                f"Sample trade #{i+1} for {symbol}", tags, now_iso, now_iso
+            )
+            for i, (symbol, tags, trade_date, close_date)
+            in enumerate(zip(trade_symbols, trade_tags, opened_iso, closed_iso))
+        ]
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        # Insert trades in chunks, getting the new IDs back from RETURNING.
+        # RETURNING order is unspecified, but AUTOINCREMENT ids ascend in row order.
+        trade_ids = []
+        for start in range(0, len(trade_rows), TRADE_CHUNK):
+            chunk = trade_rows[start:start + TRADE_CHUNK]
+            cursor.execute(
+                TRADE_SQL.format(values=", ".join([TRADE_VALUES] * len(chunk))),
+                [value for row in chunk for value in row]
+            )
+            trade_ids.extend(sorted(row[0] for row in cursor.fetchall()))
+        
+        # Buy and sell legs for every trade (tolist() converts to native Python types for sqlite3)
+        leg_rows = []
+        for trade_id, trade_date, close_date, quantity, entry_price, exit_price, buy_fee, sell_fee in zip(
+            trade_ids, opened_iso, closed_iso, quantities.tolist(), entry_prices.tolist(),
+            exit_prices.tolist(), buy_fees.tolist(), sell_fees.tolist()
+        ):
+            leg_rows.append((
+                trade_id, "buy", quantity, entry_price, buy_fee,
+                trade_date, "Entry", now_iso, now_iso
             ))
-            
-            # Insert sell leg
-            cursor.execute("""
-                INSERT INTO trade_legs (trade_id, action, quantity, price, fees, executed_at, notes, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                trade_id, "sell", quantity, exit_price, round(random.uniform(0.5, 2.0), 2),
-                close_date.isoformat(), "Exit", now.isoformat(), now.isoformat()
+            leg_rows.append((
+                trade_id, "sell", quantity, exit_price, sell_fee,
+                close_date, "Exit", now_iso, now_iso
             ))
         
-        conn.commit()
+        cursor.executemany(LEG_SQL, leg_rows)
+        
+        cursor.execute("COMMIT")
         print(f"Successfully added {num_trades} sample trades!")
 
 if __name__ == "__main__":
@@ -7,32 +7,78 @@ Provides login, registration, and session management functionality.
 import streamlit as st
 import sqlite3
 import hashlib
-import secrets
+import hmac
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from utils.db_init import create_indexes, tune_connection
 
 # Database path
 DB_PATH = Path("data/tradecraft.db")
 
+# Argon2id parameters per OWASP guidance (46 MiB, 3 passes, 1 lane)
+_password_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1)
+
+# Verified against when a username doesn't exist, so failed logins take the same time.
+# Precomputed (same parameters as above, random discarded password) so importing this
+# module doesn't spend a full Argon2 hash; regenerate it if the parameters change.
+_DUMMY_HASH = "$argon2id$v=19$m=47104,t=3,p=1$WOiERjiIThoFdzM1JMIYuA$9Zope8fLbyx6YYz1th+Z3UJ/IPxEj5B0M87x/hBhKP0"
+
 def hash_password(password: str) -> str:
-    """Hash a password using SHA-256 with a salt."""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{password_hash}"
+    """Hash a password using Argon2id."""
+    return _password_hasher.hash(password)
 
-def verify_password(password: str, stored_hash: str) -> bool:
-    """Verify a password against a stored hash."""
+def _verify_legacy_password(password: str, stored_hash: str) -> bool:
+    """Verify a password against a legacy SHA-256 "salt:hash" string."""
     try:
         salt, password_hash = stored_hash.split(":", 1)
-        computed_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return computed_hash == password_hash
+        # Feed password then salt incrementally; same digest as hashing the concatenation
+        digest = hashlib.sha256(password.encode())
+        digest.update(salt.encode())
+        computed_hash = digest.hexdigest()
+        return hmac.compare_digest(computed_hash, password_hash)
     except ValueError:
         return False
 
+def verify_password(password: str, stored_hash: str) -> bool:
+    """Verify a password against a stored Argon2id or legacy SHA-256 hash."""
+    if not stored_hash:
+        return False
+    if not stored_hash.startswith("$argon2"):
+        return _verify_legacy_password(password, stored_hash)
+    try:
+        return _password_hasher.verify(stored_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def needs_rehash(stored_hash: str) -> bool:
+    """Check whether a stored hash is legacy or uses outdated Argon2 parameters."""
+    if not stored_hash or not stored_hash.startswith("$argon2"):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(stored_hash)
+    except InvalidHashError:
+        return True
+
+@st.cache_resource
 def get_db_connection() -> sqlite3.Connection:
-    """Get database connection."""
-    return sqlite3.connect(DB_PATH)
+    """Get the shared, long-lived database connection."""
+    conn = tune_connection(sqlite3.connect(DB_PATH, check_same_thread=False))
+    # Older databases may predate the users.email / accounts.user_id indexes
+    create_indexes(conn)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+@st.cache_resource
+def _get_write_lock() -> threading.Lock:
+    """Lock serializing write transactions on the shared connection."""
+    return threading.Lock()
 
 def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     """
@@ -45,23 +91,38 @@ def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     Returns:
         User dict if authentication successful, None otherwise
     """
+    if not username or not password:
+        return None
+    
     try:
-        with get_db_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT id, username, email, password_hash FROM users WHERE username = ?",
-                (username,)
-            )
-            user_row = cursor.fetchone()
-            
-            if user_row and verify_password(password, user_row['password_hash']):
-                return {
-                    'id': user_row['id'],
-                    'username': user_row['username'],
-                    'email': user_row['email']
-                }
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT id, username, email, password_hash FROM users WHERE username = ?",
+            (username,)
+        )
+        user_row = cursor.fetchone()
+        
+        if user_row is None:
+            # Burn the same hashing cost as a real check to avoid username enumeration
+            verify_password(password, _DUMMY_HASH)
+            return None
+        
+        if verify_password(password, user_row['password_hash']):
+            # Transparently upgrade legacy/outdated hashes on successful login
+            if needs_rehash(user_row['password_hash']):
+                new_hash = hash_password(password)
+                with _get_write_lock(), conn:
+                    conn.execute(
+                        "UPDATE users SET password_hash = ? WHERE id = ?",
+                        (new_hash, user_row['id'])
+                    )
+            return {
+                'id': user_row['id'],
+                'username': user_row['username'],
+                'email': user_row['email']
+            }
     except Exception as e:
         st.error(f"Authentication error: {e}")
     
@@ -80,28 +141,28 @@ def create_user(username: str, email: str, password: str) -> bool:
         True if user created successfully, False otherwise
     """
     try:
-        with get_db_connection() as conn:
+        # Hash outside the write lock so a slow hash does not block other writers
+        password_hash = hash_password(password)
+        
+        with _get_write_lock(), get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # Check if username already exists
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            if cursor.fetchone():
-                st.error("Username already exists!")
-                return False
-            
-            # Check if email already exists
-            cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
-            if cursor.fetchone():
-                st.error("Email already exists!")
+            # Check username and email in one query; a username clash is reported first
+            cursor.execute(
+                "SELECT username = ? FROM users WHERE username = ? OR email = ? "
+                "ORDER BY username = ? DESC LIMIT 1",
+                (username, username, email, username)
+            )
+            existing = cursor.fetchone()
+            if existing:
+                st.error("Username already exists!" if existing[0] else "Email already exists!")
                 return False
             
             # Create the user
-            password_hash = hash_password(password)
             cursor.execute(
                 "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
                 (username, email, password_hash)
             )
-            conn.commit()
             
             st.success("Account created successfully! Please log in.")
             return True
@@ -110,17 +171,21 @@ def create_user(username: str, email: str, password: str) -> bool:
         st.error(f"Error creating user: {e}")
         return False
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_user_accounts(user_id: int) -> list:
     """Get all accounts for a user."""
     try:
-        with get_db_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT id, name, broker FROM accounts WHERE user_id = ? ORDER BY name",
-                (user_id,)
-            )
-            return [dict(row) for row in cursor.fetchall()]
+        # Plain tuple rows zipped with the column names once, instead of building
+        # a sqlite3.Row per row and then copying it into a dict (Row objects
+        # can't be returned directly because st.cache_data must pickle them)
+        cursor = get_db_connection().cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            "SELECT id, name, broker FROM accounts WHERE user_id = ? ORDER BY name",
+            (user_id,)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
     except Exception as e:
         st.error(f"Error fetching accounts: {e}")
         return []
@@ -134,70 +199,89 @@ def get_current_user() -> Optional[Dict[str, Any]]:
     return st.session_state.get('user')
 
 def logout():
-    """Log out the current user."""
-    if 'user' in st.session_state:
-        del st.session_state.user
-    st.rerun()
+    """Log out the current user (reruns only if someone was logged in)."""
+    if st.session_state.pop('user', None) is not None:
+        st.rerun()
+
+# Static login page markup, built once at import rather than on every rerun
+_LOGIN_CSS = """
+<style>
+.login-container {
+    max-width: 450px;
+    margin: 2rem auto;
+    padding: 2.5rem;
+    border-radius: 12px;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+.login-header {
+    text-align: center;
+    margin-bottom: 2rem;
+}
+.login-title {
+    font-size: 2.5rem;
+    font-weight: bold;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+    margin-bottom: 0.5rem;
+}
+.login-subtitle {
+    font-size: 1.1rem;
+    margin-bottom: 0;
+    opacity: 0.8;
+}
+.demo-info {
+    background: rgba(52, 152, 219, 0.1);
+    border-left: 4px solid #3498db;
+    padding: 1rem;
+    border-radius: 8px;
+    margin-top: 2rem;
+}
+.demo-info h4 {
+    color: #3498db;
+    margin-top: 0;
+}
+.demo-accounts {
+    font-family: monospace;
+    background: rgba(0, 0, 0, 0.05);
+    padding: 0.5rem;
+    border-radius: 4px;
+    margin: 0.5rem 0;
+}
+</style>
+"""
+
+_LOGIN_HEADER_HTML = """
+<div class="login-header">
+    <h1 class="login-title">📈 TradeCraft</h1>
+    <p class="login-subtitle">Your Personal Trading Journal</p>
+</div>
+"""
+
+_DEMO_INFO_HTML = """
+<div class="demo-info">
+    <h4>🚀 Demo Accounts</h4>
+    <p>Try these demo accounts with sample trading data:</p>
+    <div class="demo-accounts">
+        <strong>Username:</strong> alice<br>
+        <strong>Password:</strong> password123
+    </div>
+    <div class="demo-accounts">
+        <strong>Username:</strong> bob<br>
+        <strong>Password:</strong> password123
+    </div>
+    <p><em>Both accounts have sample trades and analytics data for testing.</em></p>
+</div>
+"""
 
 def show_login_form():
     """Display the login form."""
-    # Custom CSS for the login form
-    st.markdown("""
-    <style>
-    .login-container {
-        max-width: 450px;
-        margin: 2rem auto;
-        padding: 2.5rem;
-        border-radius: 12px;
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    .login-header {
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .login-title {
-        font-size: 2.5rem;
-        font-weight: bold;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        margin-bottom: 0.5rem;
-    }
-    .login-subtitle {
-        font-size: 1.1rem;
-        margin-bottom: 0;
-        opacity: 0.8;
-    }
-    .demo-info {
-        background: rgba(52, 152, 219, 0.1);
-        border-left: 4px solid #3498db;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-top: 2rem;
-    }
-    .demo-info h4 {
-        color: #3498db;
-        margin-top: 0;
-    }
-    .demo-accounts {
-        font-family: monospace;
-        background: rgba(0, 0, 0, 0.05);
-        padding: 0.5rem;
-        border-radius: 4px;
-        margin: 0.5rem 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_LOGIN_CSS, unsafe_allow_html=True)
     
     # Header
-    st.markdown("""
-    <div class="login-header">
-        <h1 class="login-title">📈 TradeCraft</h1>
-        <p class="login-subtitle">Your Personal Trading Journal</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_LOGIN_HEADER_HTML, unsafe_allow_html=True)
     
     # Login/Register tabs
     tab1, tab2 = st.tabs(["🔐 Sign In", "📝 Create Account"])
@@ -249,21 +333,12 @@ def show_login_form():
                             st.info("Account created! Please switch to the Sign In tab to log in.")
     
     # Demo accounts info
-    st.markdown("""
-    <div class="demo-info">
-        <h4>🚀 Demo Accounts</h4>
-        <p>Try these demo accounts with sample trading data:</p>
-        <div class="demo-accounts">
-            <strong>Username:</strong> alice<br>
-            <strong>Password:</strong> password123
-        </div>
-        <div class="demo-accounts">
-            <strong>Username:</strong> bob<br>
-            <strong>Password:</strong> password123
-        </div>
-        <p><em>Both accounts have sample trades and analytics data for testing.</em></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_DEMO_INFO_HTML, unsafe_allow_html=True)
+
+@lru_cache(maxsize=64)
+def _welcome_markdown(username: str) -> str:
+    """Build the header greeting once per username."""
+    return f"### 👋 Welcome, **{username}**"
 
 def show_user_header():
     """Show logged-in user header with logout option."""
@@ -273,7 +348,7 @@ def show_user_header():
     
     col1, col2, col3 = st.columns([3, 1, 1])    
     with col1:
-        st.markdown(f"### 👋 Welcome, **{user['username']}**")
+        st.markdown(_welcome_markdown(user['username']))
     
     with col2:
         # Get user's accounts count and create initial account if needed
@@ -309,51 +384,60 @@ def require_auth(app_function):
 
 def get_demo_users():
     """Get or create demo users for testing."""
+    demo_users = [
+        ('alice', 'alice@demo.com', 'password123'),
+        ('bob', 'bob@demo.com', 'password123')
+    ]
+    
     try:
-        with get_db_connection() as conn:
+        with _get_write_lock(), get_db_connection() as conn:
             cursor = conn.cursor()
             
             # Check if demo users exist
             cursor.execute("SELECT username FROM users WHERE username IN ('alice', 'bob')")
-            existing_users = [row[0] for row in cursor.fetchall()]
-            
-            # Create missing demo users
-            demo_users = [
-                ('alice', 'alice@demo.com', 'password123'),
-                ('bob', 'bob@demo.com', 'password123')
-            ]
+            existing_users = {row[0] for row in cursor.fetchall()}
             
-            for username, email, password in demo_users:
-                if username not in existing_users:
-                    password_hash = hash_password(password)
-                    cursor.execute(
-                        "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
-                        (username, email, password_hash)
-                    )
+            # Nothing to do (and no passwords to hash) when both already exist
+            missing = [user for user in demo_users if user[0] not in existing_users]
+            if not missing:
+                return
             
-            conn.commit()
+            # Hash in parallel (argon2-cffi releases the GIL), then create missing demo users
+            with ThreadPoolExecutor(max_workers=min(4, len(missing))) as executor:
+                hashes = list(executor.map(hash_password, [password for _, _, password in missing]))
+            cursor.executemany(
+                "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                [(username, email, password_hash)
+                 for (username, email, _), password_hash in zip(missing, hashes)]
+            )
             
     except Exception as e:
         print(f"Error creating demo users: {e}")
 
+@st.cache_resource
+def _bootstrap_demo_users() -> bool:
+    """Create demo users once per server process, surviving module reloads."""
+    get_demo_users()
+    return True
+
 def create_initial_account(user_id: int, username: str) -> bool:
     """Create an initial trading account for a new user."""
     try:
-        with get_db_connection() as conn:
+        with _get_write_lock(), get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # Check if user already has accounts
-            cursor.execute("SELECT COUNT(*) FROM accounts WHERE user_id = ?", (user_id,))
-            account_count = cursor.fetchone()[0]
-            
-            if account_count == 0:
-                # Create initial account
-                now = datetime.now().isoformat()
-                cursor.execute(
-                    "INSERT INTO accounts (user_id, name, broker, account_number, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-                    (user_id, f"{username}_trading_account", "Personal Broker", f"{username.upper()}-001", now, now)
-                )
-                conn.commit()
+            # Create the initial account only if the user has none, in one statement;
+            # an unchanged user leaves rowcount at 0 and the accounts cache untouched
+            now = datetime.now().isoformat()
+            cursor.execute(
+                """INSERT INTO accounts (user_id, name, broker, account_number, created_at, updated_at)
+                   SELECT ?, ?, ?, ?, ?, ?
+                   WHERE NOT EXISTS (SELECT 1 FROM accounts WHERE user_id = ?)""",
+                (user_id, f"{username}_trading_account", "Personal Broker", f"{username.upper()}-001", now, now,
+                 user_id)
+            )
+            if cursor.rowcount:
+                get_user_accounts.clear()
                 return True
     except Exception as e:
         st.error(f"Error creating initial account: {e}")
@@ -361,4 +445,4 @@ def create_initial_account(user_id: int, username: str) -> bool:
     return False
 
 # Initialize demo users when module is imported
-get_demo_users()
+_bootstrap_demo_users()
@@ -1,38 +1,63 @@
 """
 Configuration management for TradeCraft application.
 
-Handles environment variables and application settings.
+Handles environment variables and application settings. The .env file is only
+read when a setting is first looked up, not at import.
 """
+import functools
 import os
 from pathlib import Path
-from typing import Optional
-
-# Load environment variables from .env file if it exists
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    # dotenv not installed, skip loading .env file
-    pass
-
-# Database configuration
-DB_PATH = Path(os.getenv("DB_PATH", os.getenv("DATABASE_PATH", "data/tradecraft.db")))
-
-# Application configuration
-DEFAULT_USER = os.getenv("DEFAULT_USER", "alice")
-DEBUG_MODE = os.getenv("DEBUG", "True").lower() == "true"
-
-# UI configuration
-APP_TITLE = os.getenv("APP_TITLE", "TradeCraft Trading Journal")
 
+@functools.lru_cache(maxsize=1)
+def _load_env() -> None:
+    """Load environment variables from a .env file once, on the first config lookup."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # dotenv not installed, skip loading .env file
+        pass
+
+@functools.lru_cache(maxsize=1)
 def get_db_path() -> Path:
     """Get the database path from configuration."""
-    return DB_PATH
+    _load_env()
+    return Path(os.getenv("DB_PATH", os.getenv("DATABASE_PATH", "data/tradecraft.db")))
 
+@functools.lru_cache(maxsize=1)
 def get_default_user() -> str:
     """Get the default username from configuration."""
-    return DEFAULT_USER
+    _load_env()
+    return os.getenv("DEFAULT_USER", "alice")
 
+@functools.lru_cache(maxsize=1)
 def is_debug_mode() -> bool:
     """Check if application is running in debug mode."""
-    return DEBUG_MODE
+    _load_env()
+    return os.getenv("DEBUG", "True").lower() == "true"
+
+@functools.lru_cache(maxsize=1)
+def get_app_title() -> str:
+    """Get the UI title from configuration."""
+    _load_env()
+    return os.getenv("APP_TITLE", "TradeCraft Trading Journal")
+
+# Module-level constants, resolved on first access instead of at import
+_LAZY_SETTINGS = {
+    # Database configuration
+    "DB_PATH": get_db_path,
+    # Application configuration
+    "DEFAULT_USER": get_default_user,
+    "DEBUG_MODE": is_debug_mode,
+    # UI configuration
+    "APP_TITLE": get_app_title,
+}
+
+def __getattr__(name: str):
+    """Resolve a configuration constant on first access and keep it as a module global."""
+    try:
+        getter = _LAZY_SETTINGS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = globals()[name] = getter()
+    return value
@@ -6,16 +6,25 @@ Much simpler than the complex Dash version!
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import sqlite3
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple
 import calendar
+from contextlib import closing
+from functools import lru_cache
 import os
 
+from utils.analytics import (cumulative_pnl, histogram_bars, max_drawdown, monthly_totals,
+                             return_volatility_ratio, weekday_totals)
+from utils.dates import to_datetime_cached
+from utils.db_access import fetch_trade_analytics, get_filter_lookups
+from utils.downsample import lttb
+from utils.db_init import tune_connection
+
 # Authentication removed for personal use
 
 # Configure page
@@ -26,121 +35,68 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #1f4e79 0%, #2c5aa0 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        margin-bottom: 1rem;
-        text-align: center;
-        color: white;
-    }
-    .metric-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #2c5aa0;
-    }
-    .success-metric {
-        border-left-color: #28a745;
-    }
-    .danger-metric {
-        border-left-color: #dc3545;
-    }
-    .warning-metric {
-        border-left-color: #ffc107;
-    }
-    .sidebar .sidebar-content {
-        background: #f8f9fa;
-    }
-    .stDataFrame {
-        border: 1px solid #e0e0e0;
-        border-radius: 5px;
-    }
-    /* Clean tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-        margin-bottom: 1rem;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        padding-left: 20px;
-        padding-right: 20px;
-        border-radius: 8px;
-    }
-    /* Add some space after the header */
-    .main-header + div {
-        margin-top: 1rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better styling (read from disk once per server process)
+@st.cache_resource
+def load_css(path: str = "assets/streamlit.css") -> str:
+    """Load the app stylesheet wrapped in a <style> tag."""
+    return f"<style>\n{(Path(__file__).parent / path).read_text()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Database functions (simplified from your existing utils)
 @st.cache_resource
 def get_db_connection(db_path: str = "data/tradecraft.db"):
     """Get database connection with resource caching."""
-    return sqlite3.connect(db_path, check_same_thread=False)
+    # Shared by every session's script thread; only used for reads
+    return tune_connection(sqlite3.connect(db_path, check_same_thread=False))
 
 @st.cache_data(ttl=60)
 def load_trades(account_id: Optional[int] = None) -> pd.DataFrame:
     """Load trades from database with P&L calculations."""
     try:
-        conn = sqlite3.connect("data/tradecraft.db")
-        
-        query = "SELECT * FROM trades"
+        conn = get_db_connection()
+        
+        # Tags come from the normalized trade_tags table (indexed join); the
+        # legacy comma-separated trades.tags column is only a fallback
+        query = """
+            SELECT t.*, (
+                SELECT GROUP_CONCAT(tags.name, ', ')
+                FROM trade_tags tt JOIN tags ON tags.id = tt.tag_id
+                WHERE tt.trade_id = t.id
+            ) AS normalized_tags
+            FROM trades t
+        """
         params = []
         
         if account_id:
-            query += " WHERE account_id = ?"
+            query += " WHERE t.account_id = ?"
             params.append(account_id)
         
-        query += " ORDER BY opened_at DESC"
+        query += " ORDER BY t.opened_at DESC"
         
         df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        
+        df['tags'] = df.pop('normalized_tags').fillna(df['tags'])
         
         if not df.empty:
             # Convert date columns
             date_cols = ['opened_at', 'closed_at']
             for col in date_cols:
                 if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                    df[col] = to_datetime_cached(df[col])
             
-            # Calculate P&L for each trade using the existing analytics function
-            pnl_data = []
-            for _, trade in df.iterrows():
-                try:
-                    # Import the analytics function
-                    import sys
-                    sys.path.append('.')
-                    from utils.db_access import trade_analytics
-                    
-                    analytics = trade_analytics(trade['id'])
-                    pnl_data.append({
-                        'trade_id': trade['id'],
-                        'realized_pnl': analytics.get('realized_pnl', 0.0),
-                        'status': analytics.get('status', 'UNKNOWN'),
-                        'total_fees': analytics.get('total_fees', 0.0),
-                        'avg_buy_price': analytics.get('avg_buy_price', 0.0),
-                        'avg_sell_price': analytics.get('avg_sell_price', 0.0),
-                        'open_qty': analytics.get('open_qty', 0.0)
-                    })
-                except Exception as e:
-                    pnl_data.append({
-                        'trade_id': trade['id'],
-                        'realized_pnl': 0.0,
-                        'status': 'ERROR',
-                        'total_fees': 0.0,
-                        'avg_buy_price': 0.0,
-                        'avg_sell_price': 0.0,
-                        'open_qty': 0.0
-                    })
+            # Low-cardinality string columns filter and group on integer codes
+            category_cols = [col for col in ('asset_symbol', 'asset_type') if col in df.columns]
+            df = df.astype(dict.fromkeys(category_cols, 'category'))
+            
+            # Calculate P&L for every trade with one grouped query
+            pnl_data = fetch_trade_analytics(account_id or None)
+            pnl_columns = ['trade_id', 'realized_pnl', 'status', 'total_fees',
+                           'avg_buy_price', 'avg_sell_price', 'open_qty']
             
             # Add P&L data to the DataFrame
             if pnl_data:
-                pnl_df = pd.DataFrame(pnl_data)
+                pnl_df = pd.DataFrame(pnl_data, columns=pnl_columns)
                 df = df.merge(pnl_df, left_on='id', right_on='trade_id', how='left')
                 
                 # Add some computed columns for better display
@@ -156,42 +112,26 @@ def load_trades(account_id: Optional[int] = None) -> pd.DataFrame:
 def load_accounts() -> pd.DataFrame:
     """Load all available accounts."""
     try:
-        conn = sqlite3.connect("data/tradecraft.db")
-        df = pd.read_sql_query("SELECT * FROM accounts ORDER BY name", conn)
-        conn.close()
-        return df
+        conn = get_db_connection()
+        return pd.read_sql_query("SELECT * FROM accounts ORDER BY name", conn)
     except Exception as e:
         st.error(f"Error loading accounts: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=60)
-def get_unique_symbols(df: pd.DataFrame) -> List[str]:
-    """Get unique symbols from trades."""
-    if df.empty:
-        return []
-    
-    # Check for both 'symbol' and 'asset_symbol' columns
-    symbol_col = None
-    if 'symbol' in df.columns:
-        symbol_col = 'symbol'
-    elif 'asset_symbol' in df.columns:
-        symbol_col = 'asset_symbol'
-    
-    if symbol_col is None:
-        return []
-    
-    return sorted(df[symbol_col].dropna().unique().tolist())
+@st.cache_data(ttl=60, show_spinner=False)
+def load_account_options() -> Dict[int, str]:
+    """Account ids mapped to selector labels, built once per cache window."""
+    accounts_df = load_accounts()
+    if accounts_df.empty:
+        return {}
+    return {account_id: f"{name} (ID: {account_id})"
+            for name, account_id in zip(accounts_df['name'], accounts_df['id'].tolist())}
 
-@st.cache_data(ttl=60)
-def get_unique_tags(df: pd.DataFrame) -> List[str]:
-    """Get unique tags from trades."""
-    if df.empty or 'tags' not in df.columns:
-        return []
-    all_tags = []
-    for tags in df['tags'].dropna():
-        if tags:
-            all_tags.extend([tag.strip() for tag in str(tags).split(',')])
-    return sorted(list(set(all_tags)))
+@st.cache_data(ttl=60, show_spinner=False)
+def load_filter_options(account_id: Optional[int] = None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Symbol and tag filter options for an account as immutable tuples, cached by account id."""
+    lookups = get_filter_lookups(account_id or None)
+    return tuple(lookups['symbols']), tuple(lookups['tags'])
 
 def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
     """Calculate comprehensive portfolio statistics."""
@@ -230,41 +170,40 @@ def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
         default_stats['total_trades'] = len(df)
         return default_stats
     
-    wins = df_clean[df_clean[pnl_col] > 0]
-    losses = df_clean[df_clean[pnl_col] < 0]
+    # One array conversion and one set of masks, shared by all the stats below
+    pnl = df_clean[pnl_col].to_numpy(dtype=float)
+    win_mask = pnl > 0
+    loss_mask = pnl < 0
+    n_wins = int(win_mask.sum())
+    n_losses = int(loss_mask.sum())
     
     # Basic stats
-    total_trades = len(df_clean)
-    total_pnl = df_clean[pnl_col].sum()
-    win_rate = len(wins) / total_trades * 100 if total_trades > 0 else 0
-    avg_win = wins[pnl_col].mean() if len(wins) > 0 else 0
-    avg_loss = losses[pnl_col].mean() if len(losses) > 0 else 0
+    total_trades = len(pnl)
+    total_pnl = pnl.sum()
+    win_rate = n_wins / total_trades * 100 if total_trades > 0 else 0
+    avg_win = pnl[win_mask].mean() if n_wins > 0 else 0
+    avg_loss = pnl[loss_mask].mean() if n_losses > 0 else 0
     
     # Expectancy calculation: (Win Rate * Avg Win) + (Loss Rate * Avg Loss)
-    loss_rate = (total_trades - len(wins)) / total_trades if total_trades > 0 else 0
+    loss_rate = (total_trades - n_wins) / total_trades if total_trades > 0 else 0
     expectancy = (win_rate/100 * avg_win) + (loss_rate * avg_loss) if total_trades > 0 else 0
     
     # Hold time calculations (if date columns exist)
     avg_win_hold_time = 0.0
     avg_loss_hold_time = 0.0
     if 'opened_at' in df_clean.columns and 'closed_at' in df_clean.columns:
-        # Calculate hold times for wins and losses
-        df_with_dates = df_clean.dropna(subset=['opened_at', 'closed_at']).copy()
-        if not df_with_dates.empty:
-            df_with_dates['hold_time_days'] = (
-                pd.to_datetime(df_with_dates['closed_at']) - 
-                pd.to_datetime(df_with_dates['opened_at'])
-            ).dt.total_seconds() / (24 * 3600)
-            
-            # Average hold time for wins
-            win_trades = df_with_dates[df_with_dates[pnl_col] > 0]
-            if not win_trades.empty:
-                avg_win_hold_time = win_trades['hold_time_days'].mean()
-            
-            # Average hold time for losses
-            loss_trades = df_with_dates[df_with_dates[pnl_col] < 0]
-            if not loss_trades.empty:
-                avg_loss_hold_time = loss_trades['hold_time_days'].mean()
+        # Hold times in days; NaN where either date is missing
+        hold_time_days = (
+            (pd.to_datetime(df_clean['closed_at']) - pd.to_datetime(df_clean['opened_at']))
+            .dt.total_seconds().to_numpy() / (24 * 3600)
+        )
+        has_dates = ~np.isnan(hold_time_days)
+        
+        # Average hold time for wins and losses
+        if (has_dates & win_mask).any():
+            avg_win_hold_time = hold_time_days[has_dates & win_mask].mean()
+        if (has_dates & loss_mask).any():
+            avg_loss_hold_time = hold_time_days[has_dates & loss_mask].mean()
     
     # Win/Loss streak calculations
     def calculate_streaks(pnl_series):
@@ -292,16 +231,15 @@ def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
         
         return max_win_streak, max_loss_streak
     
-    max_win_streak, max_loss_streak = calculate_streaks(df_clean[pnl_col])
+    max_win_streak, max_loss_streak = calculate_streaks(pnl.tolist())
     
     # Average daily volume calculation (if we have quantity/size data)
     avg_daily_vol = 0.0
     if 'opened_at' in df_clean.columns:
-        df_with_dates = df_clean.dropna(subset=['opened_at']).copy()
-        if not df_with_dates.empty:
-            df_with_dates['date'] = pd.to_datetime(df_with_dates['opened_at']).dt.date
-            daily_trades = df_with_dates.groupby('date').size()
-            avg_daily_vol = daily_trades.mean() if len(daily_trades) > 0 else 0
+        # Mean trades per active day = trades / distinct trading days
+        trade_days = pd.to_datetime(df_clean['opened_at'].dropna()).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        if len(trade_days):
+            avg_daily_vol = len(trade_days) / len(np.unique(trade_days))
     
     # Average position size (using a proxy calculation if available)
     avg_size = 0.0
@@ -309,8 +247,7 @@ def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
         # Use average of buy and sell prices as position size proxy
         df_size = df_clean.dropna(subset=['avg_buy_price', 'avg_sell_price'])
         if not df_size.empty:
-            df_size['avg_price'] = (df_size['avg_buy_price'] + df_size['avg_sell_price']) / 2
-            avg_size = df_size['avg_price'].mean()
+            avg_size = ((df_size['avg_buy_price'] + df_size['avg_sell_price']) / 2).mean()
     elif 'avg_buy_price' in df_clean.columns:
         # Use buy price as proxy
         avg_size = df_clean['avg_buy_price'].mean()
@@ -321,8 +258,8 @@ def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
         'win_rate': win_rate,
         'avg_win': avg_win,
         'avg_loss': avg_loss,
-        'largest_win': df_clean[pnl_col].max() if total_trades > 0 else 0,
-        'largest_loss': df_clean[pnl_col].min() if total_trades > 0 else 0,
+        'largest_win': pnl.max() if total_trades > 0 else 0,
+        'largest_loss': pnl.min() if total_trades > 0 else 0,
         'expectancy': expectancy,
         'avg_win_hold_time': avg_win_hold_time,
         'avg_loss_hold_time': avg_loss_hold_time,
@@ -332,8 +269,23 @@ def calculate_portfolio_stats(df: pd.DataFrame) -> Dict[str, Any]:
         'avg_size': avg_size
     }
 
+def narrow(df: pd.DataFrame, columns: tuple) -> pd.DataFrame:
+    """Project a frame onto the chart's columns (those present) so caches hash and charts read only those."""
+    return df[[col for col in columns if col in df.columns]]
+
+# Columns create_equity_curve reads
+EQUITY_CURVE_COLUMNS = ('opened_at', 'closed_at', 'realized_pnl', 'pnl')
+# Equity curves longer than this are downsampled (LTTB) to the target size
+EQUITY_CURVE_MAX_POINTS = 4000
+EQUITY_CURVE_TARGET_POINTS = 3000
+# Line traces above this size render through WebGL
+WEBGL_MIN_POINTS = 1000
+# Duration vs P&L scatter is reduced (LTTB) to at most this many points
+DURATION_SCATTER_MAX_POINTS = 200
+
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
 def create_equity_curve(df: pd.DataFrame) -> go.Figure:
-    """Create equity curve chart."""
+    """Create equity curve chart (memoized on the frame's content hash)."""
     if df.empty:
         fig = go.Figure()
         fig.add_annotation(text="No data available", xref="paper", yref="paper",
@@ -344,55 +296,99 @@ def create_equity_curve(df: pd.DataFrame) -> go.Figure:
     pnl_col = 'realized_pnl' if 'realized_pnl' in df.columns else 'pnl'
     
     # For equity curve, use closed_at if available and not null, otherwise opened_at
-    if 'closed_at' in df.columns:
-        # Filter to only completed trades (those with closed_at dates)
-        completed_trades = df.dropna(subset=['closed_at'])
-        if not completed_trades.empty:
-            date_col = 'closed_at'
-            df_for_curve = completed_trades
-        else:
-            # Fall back to opened_at if no closed trades
-            date_col = 'opened_at'
-            df_for_curve = df
-    else:
-        date_col = 'opened_at'
-        df_for_curve = df
+    # (fall back to opened_at if no trades are closed)
+    date_col = 'closed_at' if 'closed_at' in df.columns and df['closed_at'].notna().any() else 'opened_at'
     
-    if pnl_col not in df_for_curve.columns or date_col not in df_for_curve.columns:
+    if pnl_col not in df.columns or date_col not in df.columns:
         fig = go.Figure()
         fig.add_annotation(text="Missing P&L or date data", xref="paper", yref="paper",
                           x=0.5, y=0.5, showarrow=False)
         return fig
     
-    # Filter out rows with null P&L or dates
-    df_clean = df_for_curve.dropna(subset=[pnl_col, date_col])
+    # Keep rows with both P&L and a date via a mask on the two arrays, not dropna copies
+    dates = df[date_col].to_numpy(dtype='datetime64[ns]')
+    pnl = df[pnl_col].to_numpy(dtype=np.float64)
+    complete = ~np.isnat(dates) & ~np.isnan(pnl)
     
-    if df_clean.empty:
+    if not complete.any():
         fig = go.Figure()
         fig.add_annotation(text="No complete trade data available", xref="paper", yref="paper",
                           x=0.5, y=0.5, showarrow=False)
         return fig
     
-    # Sort by date and calculate cumulative PnL
-    df_sorted = df_clean.sort_values(date_col)
-    df_sorted['cumulative_pnl'] = df_sorted[pnl_col].cumsum()
-    
-    fig = px.line(df_sorted, x=date_col, y='cumulative_pnl',
-                  title="Equity Curve (Cumulative P&L)",
-                  labels={'cumulative_pnl': 'Cumulative P&L ($)', date_col: 'Date'})
-    
-    # Add a horizontal line at y=0 for reference
-    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
-    
-    fig.update_layout(
-        hovermode='x unified',
-        showlegend=False,
-        height=400,
-        yaxis_title="Cumulative P&L ($)",
-        xaxis_title="Date"
-    )
-    
-    return fig
+    # Order by date and accumulate P&L on plain arrays
+    dates, pnl = dates[complete], pnl[complete]
+    order = np.argsort(dates, kind='stable')
+    # Only the running total is plotted, so skip the peak/drawdown buffers
+    equity = cumulative_pnl(pnl, order)
+    dates = dates[order]
+    
+    # Long histories carry more points than the chart has pixels; keep the curve's shape only
+    if len(equity) > EQUITY_CURVE_MAX_POINTS:
+        keep = lttb(dates, equity, EQUITY_CURVE_TARGET_POINTS)
+        dates, equity = dates[keep], equity[keep]
+    
+    # Build the whole figure from one dict spec: a single validation pass instead of
+    # one per trace constructor, update_layout and add_hline call
+    return go.Figure({
+        'data': [{
+            'type': 'scattergl' if len(equity) > WEBGL_MIN_POINTS else 'scatter',
+            'x': dates, 'y': equity, 'mode': 'lines', 'name': 'Cumulative P&L ($)',
+        }],
+        'layout': {
+            'title': {'text': "Equity Curve (Cumulative P&L)"},
+            # Horizontal line at y=0 for reference
+            'shapes': [{'type': 'line', 'xref': 'paper', 'x0': 0, 'x1': 1, 'y0': 0, 'y1': 0,
+                        'line': {'dash': 'dash', 'color': 'gray'}, 'opacity': 0.5}],
+            'hovermode': 'x unified',
+            'showlegend': False,
+            'height': 400,
+            'yaxis': {'title': {'text': "Cumulative P&L ($)"}},
+            'xaxis': {'title': {'text': "Date"}},
+        },
+    })
+
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
+def create_pnl_histogram(pnl: np.ndarray) -> go.Figure:
+    """Create the P&L distribution chart (memoized on the array's content hash)."""
+    # Bin on the server so the figure carries 20 bars instead of every trade
+    centers, counts, widths = histogram_bars(pnl, 20)
+    return go.Figure({
+        'data': [{'type': 'bar', 'x': centers, 'y': counts, 'width': widths,
+                  'hovertemplate': 'P&L ($)=%{x:.2f}<br>count=%{y}<extra></extra>'}],
+        'layout': {'title': {'text': "P&L Distribution"}, 'height': 400, 'showlegend': False,
+                   'xaxis': {'title': {'text': 'P&L ($)'}}, 'yaxis': {'title': {'text': 'count'}},
+                   'bargap': 0},
+    })
+
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
+def create_win_loss_pie(pnl: np.ndarray) -> go.Figure:
+    """Create the win/loss donut chart (memoized on the array's content hash)."""
+    # Count on the raw array; no filtered frames are needed for two numbers
+    return go.Figure({
+        'data': [{'type': 'pie', 'labels': ['Wins', 'Losses'],
+                  'values': [np.count_nonzero(pnl > 0), np.count_nonzero(pnl <= 0)],
+                  'hole': 0.4, 'marker': {'colors': ['#28a745', '#dc3545']}}],
+        'layout': {'title': {'text': "Win/Loss Ratio"}, 'height': 400},
+    })
+
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
+def create_monthly_pnl_chart(dates: np.ndarray, pnl: np.ndarray) -> Optional[go.Figure]:
+    """Create the monthly P&L bars from datetime64/P&L arrays, or None if no row has both."""
+    complete = ~np.isnat(dates) & ~np.isnan(pnl)
+    if not complete.any():
+        return None
+    months, monthly_pnl = monthly_totals(dates[complete], pnl[complete])
+    
+    import plotly.express as px  # only needed once there is data to chart
+    fig_monthly = px.bar(x=np.datetime_as_string(months), y=monthly_pnl,
+                        title="Monthly P&L",
+                        labels={'y': 'P&L ($)', 'x': 'Month'})
+    fig_monthly.update_layout(height=400, showlegend=False)
+    # Color bars based on positive/negative
+    colors = np.where(monthly_pnl >= 0, '#28a745', '#dc3545')
+    fig_monthly.update_traces(marker_color=colors)
+    return fig_monthly
 
 def filter_trades(df: pd.DataFrame, symbols: List[str], tags: List[str], 
                  start_date: datetime, end_date: datetime) -> pd.DataFrame:
@@ -400,7 +396,8 @@ def filter_trades(df: pd.DataFrame, symbols: List[str], tags: List[str],
     if df.empty:
         return df
     
-    filtered_df = df.copy()
+    # Boolean indexing below always yields new frames, so no defensive copy is needed
+    filtered_df = df
     
     # Filter by symbols - check both 'symbol' and 'asset_symbol'
     if symbols:
@@ -415,78 +412,110 @@ def filter_trades(df: pd.DataFrame, symbols: List[str], tags: List[str],
     
     # Filter by date range - prefer closed_at for completed trades, fallback to opened_at
     date_col = 'closed_at' if 'closed_at' in filtered_df.columns else 'opened_at'
-    if date_col in filtered_df.columns:
-        # For date filtering, use non-null dates
-        date_mask = filtered_df[date_col].notna()
-        filtered_df = filtered_df[date_mask]
-        
-        if not filtered_df.empty:
-            filtered_df = filtered_df[
-                (filtered_df[date_col].dt.date >= start_date.date()) &
-                (filtered_df[date_col].dt.date <= end_date.date())
-            ]
+    if date_col in filtered_df.columns and not filtered_df.empty:
+        # Compare the datetime64 column against day bounds in its own timezone rather
+        # than materializing a Python date per row; NaT never matches
+        dates = filtered_df[date_col]
+        tz = dates.dt.tz
+        lower = pd.Timestamp(start_date.date()).tz_localize(tz)
+        upper = pd.Timestamp(end_date.date() + timedelta(days=1)).tz_localize(tz)
+        filtered_df = filtered_df[(dates >= lower) & (dates < upper)]
     
     return filtered_df
 
+@st.cache_data(ttl=60, max_entries=64)
+def load_filtered_trades(account_id: Optional[int], symbols: tuple, tags: tuple,
+                         start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """Load and filter trades, memoized on the (hashable) filter arguments."""
+    return filter_trades(load_trades(account_id=account_id), list(symbols), list(tags),
+                         start_date, end_date)
+
+@st.cache_data(ttl=60, max_entries=64)
+def load_filtered_stats(account_id: Optional[int], symbols: tuple, tags: tuple,
+                        start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Portfolio stats for a filter combination, memoized like load_filtered_trades."""
+    return calculate_portfolio_stats(
+        load_filtered_trades(account_id, symbols, tags, start_date, end_date)
+    )
+
+class TradeTimeKeys(NamedTuple):
+    """Per-trade calendar keys of opened_at, aligned with the frame's rows (NaT where missing)."""
+    day: np.ndarray
+    month: np.ndarray
+
+def trade_time_keys(df: pd.DataFrame) -> TradeTimeKeys:
+    """Derive the day and month keys of every trade's opened_at in one conversion."""
+    if 'opened_at' in df.columns:
+        opened = df['opened_at'].to_numpy(dtype='datetime64[ns]')
+    else:
+        opened = np.full(len(df), np.datetime64('NaT', 'ns'))
+    return TradeTimeKeys(opened.astype('datetime64[D]'), opened.astype('datetime64[M]'))
+
 @st.cache_data(ttl=60)
 def load_trade_legs(trade_id: int) -> pd.DataFrame:
     """Load trade legs for a specific trade."""
     try:
-        # Import the function from utils
-        import sys
-        sys.path.append('.')
-        from utils.db_access import fetch_legs_for_trade
-        
-        legs = fetch_legs_for_trade(trade_id)
-        if legs:
-            df = pd.DataFrame(legs)
-            # Convert date columns
-            if 'executed_at' in df.columns:
-                df['executed_at'] = pd.to_datetime(df['executed_at'], errors='coerce')
-            return df
-        else:
-            return pd.DataFrame()
+        # Read straight into a DataFrame rather than via a list of row dicts
+        df = pd.read_sql_query(
+            "SELECT * FROM trade_legs WHERE trade_id = ? ORDER BY executed_at ASC",
+            get_db_connection(), params=(trade_id,)
+        )
+        # Convert date columns
+        if 'executed_at' in df.columns:
+            df['executed_at'] = pd.to_datetime(df['executed_at'], errors='coerce')
+        return df
     except Exception as e:
         st.error(f"Error loading trade legs: {e}")
         return pd.DataFrame()
 
-def get_trades_by_day(df: pd.DataFrame, year: int, month: int) -> pd.DataFrame:
-    """Get trades grouped by day for a specific month."""
+def get_trades_by_day(df: pd.DataFrame, year: int, month: int,
+                      time_keys: Optional[TradeTimeKeys] = None) -> pd.DataFrame:
+    """Get trades grouped by day for a specific month (time_keys may be precomputed for df)."""
     if df.empty:
         return pd.DataFrame()
     
-    # Filter by year and month
-    df_filtered = df.copy()
-    if 'opened_at' in df_filtered.columns:
-        df_filtered = df_filtered.dropna(subset=['opened_at'])
-        df_filtered = df_filtered[df_filtered['opened_at'].dt.year == year]
-        df_filtered = df_filtered[df_filtered['opened_at'].dt.month == month]
-        df_filtered['date'] = df_filtered['opened_at'].dt.date
+    # Filter by year and month (NaT never matches)
+    if 'opened_at' in df.columns:
+        if time_keys is None:
+            time_keys = trade_time_keys(df)
+        month_start = np.datetime64(f'{year:04d}-{month:02d}', 'M')
+        in_month = time_keys.month == month_start
+        days = time_keys.day[in_month]
+        # datetime64[D] -> object yields datetime.date for display; day is the integer
+        # day of month (1-31) used as the calendar's grouping key
+        df_filtered = df[in_month].assign(date=days.astype(object),
+                                          day=(days - month_start).astype(np.int64) + 1)
     else:
         return pd.DataFrame()
     
     return df_filtered
 
-def create_calendar_data(df: pd.DataFrame, year: int, month: int) -> Dict[str, Any]:
-    """Create calendar data structure with daily P&L and trade counts."""
+class CalendarDay(NamedTuple):
+    """One calendar cell; a tuple so the render loop reads fields by index, not dict lookups."""
+    date: date
+    day: int
+    is_current_month: bool
+    pnl: float
+    trade_count: int
+
+def create_calendar_data(df: pd.DataFrame, year: int, month: int,
+                         month_trades: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Create calendar data structure with daily P&L and trade counts (reusing month_trades if given)."""
     # Get trades for the month
-    month_trades = get_trades_by_day(df, year, month)
+    if month_trades is None:
+        month_trades = get_trades_by_day(df, year, month)
     
-    # Group by day
+    # Total by integer day of month (index 1-31) with bincount instead of grouping date objects
+    pnl_by_day = [0] * 32
+    count_by_day = [0] * 32
     if not month_trades.empty:
+        day_of_month = month_trades['day'].to_numpy()
+        count_by_day = np.bincount(day_of_month, minlength=32).tolist()
         pnl_col = 'realized_pnl' if 'realized_pnl' in month_trades.columns else 'pnl'
         if pnl_col in month_trades.columns:
-            daily_stats = month_trades.groupby('date').agg({
-                pnl_col: 'sum',
-                'id': 'count'
-            }).rename(columns={'id': 'trade_count'})
-        else:
-            daily_stats = month_trades.groupby('date').agg({
-                'id': 'count'
-            }).rename(columns={'id': 'trade_count'})
-            daily_stats[pnl_col] = 0
-    else:
-        daily_stats = pd.DataFrame()
+            # NaN P&L adds nothing, as in a groupby sum
+            pnl = np.nan_to_num(month_trades[pnl_col].to_numpy(dtype=np.float64))
+            pnl_by_day = np.bincount(day_of_month, weights=pnl, minlength=32).tolist()
     
     # Generate calendar structure
     cal = calendar.Calendar()
@@ -495,49 +524,25 @@ def create_calendar_data(df: pd.DataFrame, year: int, month: int) -> Dict[str, A
     # Create weeks structure
     weeks = []
     for week_start in range(0, len(month_dates), 7):
-        week_dates = month_dates[week_start:week_start+7]
-        week_data = []
-        
-        for date_obj in week_dates:
-            if date_obj.month != month:
-                # Day from previous/next month
-                week_data.append({
-                    'date': date_obj,
-                    'day': date_obj.day,
-                    'is_current_month': False,
-                    'pnl': 0,
-                    'trade_count': 0
-                })
-            else:
-                # Day from current month
-                if not daily_stats.empty and date_obj in daily_stats.index:
-                    pnl = daily_stats.loc[date_obj, pnl_col] if pnl_col in daily_stats.columns else 0
-                    trade_count = daily_stats.loc[date_obj, 'trade_count']
-                else:
-                    pnl = 0
-                    trade_count = 0
-                
-                week_data.append({
-                    'date': date_obj,
-                    'day': date_obj.day,
-                    'is_current_month': True,
-                    'pnl': pnl,
-                    'trade_count': trade_count
-                })
-        
-        # Calculate weekly summary
-        current_month_days = [d for d in week_data if d['is_current_month']]
-        week_pnl = sum(d['pnl'] for d in current_month_days)
-        week_trades = sum(d['trade_count'] for d in current_month_days)
-        wins = len([d for d in current_month_days if d['pnl'] > 0])
-        losses = len([d for d in current_month_days if d['pnl'] < 0])
+        week_data = [CalendarDay(
+            date_obj,
+            date_obj.day,
+            date_obj.month == month,
+            pnl_by_day[date_obj.day] if date_obj.month == month else 0,
+            count_by_day[date_obj.day] if date_obj.month == month else 0
+        ) for date_obj in month_dates[week_start:week_start + 7]]
+        
+        # Calculate weekly summary (other-month days carry zero P&L and trades)
+        day_pnls = [d.pnl for d in week_data]
+        wins = sum(pnl > 0 for pnl in day_pnls)
+        losses = sum(pnl < 0 for pnl in day_pnls)
         win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0
         
         weeks.append({
             'days': week_data,
             'summary': {
-                'pnl': week_pnl,
-                'trades': week_trades,
+                'pnl': sum(day_pnls),
+                'trades': sum(d.trade_count for d in week_data),
                 'wins': wins,
                 'losses': losses,
                 'win_rate': win_rate
@@ -546,121 +551,329 @@ def create_calendar_data(df: pd.DataFrame, year: int, month: int) -> Dict[str, A
     
     return {'weeks': weeks, 'month_name': calendar.month_name[month], 'year': year}
 
+def _calendar_today() -> None:
+    """Jump the calendar to the current month."""
+    now = datetime.now()
+    st.session_state.cal_year = now.year
+    st.session_state.cal_month = now.month
+    st.session_state.calendar_date_picker = now.date().replace(day=1)
+
+def _calendar_date_picked() -> None:
+    """Sync the calendar month with the month/year picker."""
+    selected_date = st.session_state.calendar_date_picker
+    if selected_date:
+        st.session_state.cal_year = selected_date.year
+        st.session_state.cal_month = selected_date.month
+
+# Calendar grid layout and HTML templates, built once instead of per cell per rerun
+CALENDAR_COLUMN_WIDTHS = (1, 1, 1, 1, 1, 1, 1, 1.2)
+CALENDAR_HEADERS = tuple(f"**{day}**" for day in (
+    "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Weekly Summary"))
+# P&L sign (1, -1, 0) -> (text/border color, background color)
+CALENDAR_DAY_COLORS = {
+    1: ("#28a745", "#d4edda"),   # Green for profit
+    -1: ("#dc3545", "#f8d7da"),  # Red for loss
+    0: ("#6c757d", "#f8f9fa"),   # Gray for break-even/no trades
+}
+
+def _pnl_sign(pnl: float) -> int:
+    """Return 1, -1 or 0 for a profit, loss or flat P&L (NaN counts as flat)."""
+    return int(pnl > 0) - int(pnl < 0)
+
+CALENDAR_DAY_HTML = """
+<div style="
+    background-color: {bg_color}; 
+    border: 1px solid {color}; 
+    border-radius: 8px; 
+    padding: 8px; 
+    text-align: center; 
+    min-height: 80px;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+">
+    <div style="font-size: 14px; font-weight: bold; color: #333;">
+        {day}
+    </div>
+    <div style="color: {color}; font-weight: bold; font-size: 12px; margin: 2px 0;">
+        ${pnl:.0f}
+    </div>
+    <div style="color: #666; font-size: 10px;">
+        {trade_count} trade{plural}
+    </div>
+</div>
+"""
+CALENDAR_OTHER_DAY_HTML = """
+<div style="
+    background-color: #f8f9fa; 
+    border: 1px solid #e9ecef; 
+    border-radius: 8px; 
+    padding: 8px; 
+    text-align: center; 
+    min-height: 80px;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    opacity: 0.3;
+">
+    <div style="font-size: 14px; color: #999;">
+        {day}
+    </div>
+</div>
+"""
+CALENDAR_WEEK_SUMMARY_HTML = """
+<div style="
+    background-color: #f8f9fa; 
+    border: 2px solid {pnl_color}; 
+    border-radius: 8px; 
+    padding: 12px; 
+    min-height: 80px;
+">
+    <div style="color: {pnl_color}; font-weight: bold; font-size: 14px;">
+        P&L: ${pnl:.0f}
+    </div>
+    <div style="color: #666; font-size: 12px; margin: 4px 0;">
+        Win Rate: {win_rate:.0f}%
+    </div>
+    <div style="color: #666; font-size: 11px;">
+        W: {wins} L: {losses}
+    </div>
+</div>
+"""
+
+@lru_cache(maxsize=1024)
+def _calendar_day_html(day: int, pnl: float, trade_count: int) -> str:
+    """Markup for a current-month day cell; memoized since most cells (e.g. no-trade days) repeat."""
+    color, bg_color = CALENDAR_DAY_COLORS[_pnl_sign(pnl)]
+    return CALENDAR_DAY_HTML.format(color=color, bg_color=bg_color, day=day, pnl=pnl,
+                                    trade_count=trade_count, plural='s' if trade_count != 1 else '')
+
+@lru_cache(maxsize=None)
+def _calendar_other_day_html(day: int) -> str:
+    """Markup for a grayed-out day from the previous/next month."""
+    return CALENDAR_OTHER_DAY_HTML.format(day=day)
+
 def render_calendar(calendar_data: Dict[str, Any]) -> None:
     """Render the calendar in Streamlit."""
     # Calendar grid
     st.markdown("---")
     
     # Day headers
-    day_headers = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Weekly Summary"]
-    header_cols = st.columns([1, 1, 1, 1, 1, 1, 1, 1.2])
-    for i, day in enumerate(day_headers):
+    header_cols = st.columns(CALENDAR_COLUMN_WIDTHS)
+    for i, header in enumerate(CALENDAR_HEADERS):
         with header_cols[i]:
-            st.markdown(f"**{day}**")
+            st.markdown(header)
     
     # Calendar weeks
     for week in calendar_data['weeks']:
-        week_cols = st.columns([1, 1, 1, 1, 1, 1, 1, 1.2])
+        week_cols = st.columns(CALENDAR_COLUMN_WIDTHS)
         
         # Days of the week
-        for i, day_data in enumerate(week['days']):
-            with week_cols[i]:
-                if day_data['is_current_month']:
-                    # Current month day with styling
-                    pnl = day_data['pnl']
-                    trade_count = day_data['trade_count']
-                    
-                    # Color based on P&L
-                    if pnl > 0:
-                        color = "#28a745"  # Green for profit
-                        bg_color = "#d4edda"
-                    elif pnl < 0:
-                        color = "#dc3545"  # Red for loss
-                        bg_color = "#f8d7da"
-                    else:
-                        color = "#6c757d"  # Gray for break-even/no trades
-                        bg_color = "#f8f9fa"
-                    
-                    st.markdown(f"""
-                    <div style="
-                        background-color: {bg_color}; 
-                        border: 1px solid {color}; 
-                        border-radius: 8px; 
-                        padding: 8px; 
-                        text-align: center; 
-                        min-height: 80px;
-                        display: flex;
-                        flex-direction: column;
-                        justify-content: center;
-                    ">
-                        <div style="font-size: 14px; font-weight: bold; color: #333;">
-                            {day_data['day']}
-                        </div>
-                        <div style="color: {color}; font-weight: bold; font-size: 12px; margin: 2px 0;">
-                            ${pnl:.0f}
-                        </div>
-                        <div style="color: #666; font-size: 10px;">
-                            {trade_count} trade{'s' if trade_count != 1 else ''}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+        for column, (_, day, is_current_month, pnl, trade_count) in zip(week_cols, week['days']):
+            with column:
+                if is_current_month:
+                    # Current month day, colored by P&L sign
+                    html = _calendar_day_html(day, float(pnl), int(trade_count))
                 else:
                     # Other month day (grayed out)
-                    st.markdown(f"""
-                    <div style="
-                        background-color: #f8f9fa; 
-                        border: 1px solid #e9ecef; 
-                        border-radius: 8px; 
-                        padding: 8px; 
-                        text-align: center; 
-                        min-height: 80px;
-                        display: flex;
-                        flex-direction: column;
-                        justify-content: center;
-                        opacity: 0.3;
-                    ">
-                        <div style="font-size: 14px; color: #999;">
-                            {day_data['day']}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    html = _calendar_other_day_html(day)
+                st.markdown(html, unsafe_allow_html=True)
         
         # Weekly summary
         with week_cols[7]:
             summary = week['summary']
-            pnl_color = "#28a745" if summary['pnl'] > 0 else ("#dc3545" if summary['pnl'] < 0 else "#6c757d")
-            
-            st.markdown(f"""
-            <div style="
-                background-color: #f8f9fa; 
-                border: 2px solid {pnl_color}; 
-                border-radius: 8px; 
-                padding: 12px; 
-                min-height: 80px;
-            ">
-                <div style="color: {pnl_color}; font-weight: bold; font-size: 14px;">
-                    P&L: ${summary['pnl']:.0f}
-                </div>
-                <div style="color: #666; font-size: 12px; margin: 4px 0;">
-                    Win Rate: {summary['win_rate']:.0f}%
-                </div>
-                <div style="color: #666; font-size: 11px;">
-                    W: {summary['wins']} L: {summary['losses']}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            pnl_color = CALENDAR_DAY_COLORS[_pnl_sign(summary['pnl'])][0]
+            st.markdown(CALENDAR_WEEK_SUMMARY_HTML.format(pnl_color=pnl_color, **summary),
+                        unsafe_allow_html=True)
           # Add spacing between weeks
         st.markdown("<br>", unsafe_allow_html=True)
 
-def main():
-    """Main Streamlit application."""
-      # Header with custom styling
-    st.markdown("""
+@st.fragment
+def render_trades_tab(filtered_df: pd.DataFrame) -> None:
+    """Trades table with leg drill-down; row clicks rerun only this fragment, not the charts."""
+    # Recent trades table
+    st.subheader("📋 Recent Trades")
+    st.markdown("*Click on a row to view trade legs below*")
+    
+    # Select relevant columns for display
+    display_cols = []
+    available_cols = filtered_df.columns.tolist()
+    
+    # Common columns to show with their preferred order
+    preferred_cols = [
+        'asset_symbol', 'symbol',  # Symbol columns
+        'status', 'realized_pnl', 'pnl',  # P&L columns
+        'avg_buy_price', 'avg_sell_price', 'total_fees',  # Price columns
+        'opened_at', 'closed_at',  # Date columns
+        'tags', 'notes'  # Additional info
+    ]
+    
+    for col in preferred_cols:
+        if col in available_cols and col not in display_cols:
+            display_cols.append(col)
+    
+    # Add any remaining important columns
+    for col in available_cols:
+        if col not in display_cols and col not in ['id', 'user_id', 'account_id', 'trade_id', 'created_at', 'updated_at']:
+            display_cols.append(col)
+    
+    # Limit to first 10 columns if too many
+    display_cols = display_cols[:10]
+    
+    if not filtered_df.empty and 'id' in filtered_df.columns:
+        if display_cols:
+            display_df = filtered_df[display_cols].head(20).copy()
+            
+            # Store the original trade IDs for selection mapping
+            trade_ids = filtered_df['id'].head(20).tolist()
+            
+            # Format via column_config so columns keep their numeric/datetime
+            # dtypes in the Arrow payload instead of becoming object strings
+            column_config = {}
+            for col in display_df.columns:
+                if display_df[col].dtype in ['float64', 'float32']:
+                    if any(keyword in col.lower() for keyword in ['price', 'pnl', 'fee']):
+                        column_config[col] = st.column_config.NumberColumn(format="$%.2f")
+                elif 'at' in col.lower() and pd.api.types.is_datetime64_any_dtype(display_df[col]):
+                    column_config[col] = st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")
+            
+            # Use st.dataframe with selection mode
+            selected_rows = st.dataframe(
+                display_df, 
+                use_container_width=True,
+                column_config=column_config,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="trades_table"
+            )
+            
+            # Check if a row is selected
+            if selected_rows['selection']['rows']:
+                selected_idx = selected_rows['selection']['rows'][0]
+                if selected_idx < len(trade_ids):
+                    selected_trade_id = trade_ids[selected_idx]
+                    
+                    # Show trade legs for selected trade
+                    st.markdown("---")
+                    st.subheader("🔍 Trade Legs for Selected Trade")
+                    
+                    # Get trade info for display
+                    selected_trade = filtered_df[filtered_df['id'] == selected_trade_id].iloc[0]
+                    symbol = selected_trade.get('asset_symbol', selected_trade.get('symbol', 'N/A'))
+                    pnl = selected_trade.get('realized_pnl', selected_trade.get('pnl', 0))
+                    opened_at = selected_trade.get('opened_at', 'N/A')
+                    
+                    # Format trade info
+                    if pd.notna(opened_at) and hasattr(opened_at, 'strftime'):
+                        date_str = opened_at.strftime('%Y-%m-%d %H:%M')
+                    else:
+                        date_str = str(opened_at)[:16] if str(opened_at) != 'N/A' else 'N/A'
+                    
+                    pnl_str = f"${pnl:,.2f}" if pd.notna(pnl) else "$0.00"
+                    
+                    st.info(f"**Trade:** {symbol} | **Date:** {date_str} | **P&L:** {pnl_str} | **ID:** {selected_trade_id}")
+                    
+                    # Load and display trade legs
+                    with st.spinner("Loading trade legs..."):
+                        legs_df = load_trade_legs(selected_trade_id)
+                    
+                    if not legs_df.empty:
+                        # Format via column_config; the frame itself stays typed
+                        legs_column_config = {}
+                        for col in legs_df.columns:
+                            if legs_df[col].dtype in ['float64', 'float32']:
+                                if 'price' in col.lower():
+                                    legs_column_config[col] = st.column_config.NumberColumn(format="$%.4f")
+                                elif 'amount' in col.lower() or 'value' in col.lower() or 'fee' in col.lower():
+                                    legs_column_config[col] = st.column_config.NumberColumn(format="$%.2f")
+                            elif 'at' in col.lower() and pd.api.types.is_datetime64_any_dtype(legs_df[col]):
+                                legs_column_config[col] = st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")
+                        
+                        st.dataframe(legs_df, use_container_width=True, column_config=legs_column_config)
+                        
+                        # Add some basic stats about the legs
+                        if len(legs_df) > 0:
+                            col1, col2, col3, col4 = st.columns(4)
+                            with col1:
+                                st.metric("Total Legs", len(legs_df))
+                            with col2:
+                                if 'side' in legs_df.columns:
+                                    buy_count = len(legs_df[legs_df['side'].str.upper() == 'BUY'])
+                                    st.metric("Buy Orders", buy_count)
+                            with col3:
+                                if 'side' in legs_df.columns:
+                                    sell_count = len(legs_df[legs_df['side'].str.upper() == 'SELL'])
+                                    st.metric("Sell Orders", sell_count)
+                            with col4:
+                                if 'quantity' in legs_df.columns:
+                                    total_qty = legs_df['quantity'].sum()
+                                    st.metric("Total Quantity", f"{total_qty:,.0f}")
+                    else:
+                        st.warning("No trade legs found for this trade.")
+            else:
+                st.info("👆 Click on a row in the table above to view its trade legs")
+        else:
+            # Fallback if no display columns
+            selected_rows = st.dataframe(
+                filtered_df.head(20), 
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="trades_table_fallback"
+            )
+    else:
+        st.info("No trades available to display.")
+
+# Sidebar button callbacks run before the rerun they trigger, so the new state is
+# in place for that single run (no follow-up st.rerun needed)
+def _set_date_filter(value: str) -> None:
+    st.session_state.date_filter = value
+
+def _clear_filters() -> None:
+    st.session_state.date_filter = None
+    st.session_state.symbol_filter = []
+    st.session_state.tag_filter = []
+
+def _last_month_range(today):
+    """Return the first and last day of the previous calendar month."""
+    end_of_last_month = today.replace(day=1) - timedelta(days=1)
+    return end_of_last_month.replace(day=1), end_of_last_month
+
+# Quick date filter key -> function of today returning (first day, last day)
+QUICK_DATE_RANGES = {
+    "today": lambda today: (today, today),
+    "yesterday": lambda today: (today - timedelta(days=1), today - timedelta(days=1)),
+    "this_week": lambda today: (today - timedelta(days=today.weekday()), today),
+    "last_week": lambda today: (today - timedelta(days=today.weekday() + 7),
+                                today - timedelta(days=today.weekday() + 1)),
+    "this_month": lambda today: (today.replace(day=1), today),
+    "last_month": _last_month_range,
+    "this_year": lambda today: (today.replace(month=1, day=1), today),
+    "last_year": lambda today: (today.replace(year=today.year - 1, month=1, day=1),
+                                today.replace(year=today.year - 1, month=12, day=31)),
+}
+
+# Quick date buttons as (label, date_filter key), laid out row by row in two columns
+QUICK_DATE_BUTTONS = (
+    ("Today", "today"), ("Yesterday", "yesterday"),
+    ("This Week", "this_week"), ("Last Week", "last_week"),
+    ("This Month", "this_month"), ("Last Month", "last_month"),
+    ("This Year", "this_year"), ("Last Year", "last_year"),
+)
+
+# Static page header, built once at import instead of on every rerun
+HEADER_HTML = """
     <div class="main-header">
         <h1>📈 TradeCraft Trading Journal</h1>
         <p style="margin: 0; opacity: 0.9;">Simple. Clean. Effective.</p>
     </div>
-    """, unsafe_allow_html=True)    # Navigation tabs - moved up for cleaner layout
+    """
+
+def main():
+    """Main Streamlit application."""
+    # Header with custom styling
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
+    # Navigation tabs - moved up for cleaner layout
     tab0, tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Stats", "📈 Charts", "📋 Trades", "📊 Analytics", "🗓️ Calendar", "⚙️ Settings"])
     
     # Small spacer for better visual separation
@@ -668,9 +881,7 @@ def main():
       # Add a refresh button and data info
     col1, col2 = st.columns([1, 1])
     with col1:
-        if st.button("🔄 Refresh Data", help="Clear cache and reload data"):
-            st.cache_data.clear()
-            st.rerun()
+        st.button("🔄 Refresh Data", help="Clear cache and reload data", on_click=st.cache_data.clear)
     
     with col2:
         if st.button("➕ Add Trade", help="Add a new trade"):
@@ -683,12 +894,11 @@ def main():
     st.sidebar.markdown("---")
     
     # Load accounts for current user
-    accounts_df = load_accounts()
-    if not accounts_df.empty:
-        account_options = {f"{row['name']} (ID: {row['id']})": row['id'] 
-                         for _, row in accounts_df.iterrows()}
-        selected_account_display = st.sidebar.selectbox("Account", list(account_options.keys()))
-        selected_account = account_options[selected_account_display]
+    account_options = load_account_options()
+    if account_options:
+        # The widget's value is the account id itself; labels are only used for display
+        selected_account = st.sidebar.selectbox("Account", tuple(account_options),
+                                                format_func=account_options.__getitem__)
     else:
         st.sidebar.warning("No accounts found")
         selected_account = None
@@ -718,75 +928,28 @@ def main():
             return  # Use return instead of st.stop() to exit gracefully
     
     # Get filter options
-    all_symbols = get_unique_symbols(trades_df)
-    all_tags = get_unique_tags(trades_df)
+    all_symbols, all_tags = load_filter_options(selected_account)
     
     # Quick date filters
     st.sidebar.markdown("### 📅 Quick Dates")
     
     col1, col2 = st.sidebar.columns(2)
     
-    with col1:
-        if st.button("Today", key="today"):
-            st.session_state.date_filter = "today"
-        if st.button("This Week", key="this_week"):
-            st.session_state.date_filter = "this_week"
-        if st.button("This Month", key="this_month"):
-            st.session_state.date_filter = "this_month"
-        if st.button("This Year", key="this_year"):
-            st.session_state.date_filter = "this_year"
+    for column, buttons in ((col1, QUICK_DATE_BUTTONS[::2]), (col2, QUICK_DATE_BUTTONS[1::2])):
+        for label, key in buttons:
+            column.button(label, key=key, on_click=_set_date_filter, args=(key,))
     
-    with col2:
-        if st.button("Yesterday", key="yesterday"):
-            st.session_state.date_filter = "yesterday"
-        if st.button("Last Week", key="last_week"):
-            st.session_state.date_filter = "last_week"
-        if st.button("Last Month", key="last_month"):
-            st.session_state.date_filter = "last_month"
-        if st.button("Last Year", key="last_year"):
-            st.session_state.date_filter = "last_year"
-    
-    if st.sidebar.button("All Time", key="all_time"):
-        st.session_state.date_filter = "all_time"
+    st.sidebar.button("All Time", key="all_time", on_click=_set_date_filter, args=("all_time",))
     
     # Calculate date range based on quick filter
     today = datetime.now().date()
+    date_filter = st.session_state.get('date_filter')
+    quick_range = QUICK_DATE_RANGES.get(date_filter)
     
-    if st.session_state.get('date_filter') == "today":
-        start_date = datetime.combine(today, datetime.min.time())
-        end_date = datetime.combine(today, datetime.max.time())
-    elif st.session_state.get('date_filter') == "yesterday":
-        yesterday = today - timedelta(days=1)
-        start_date = datetime.combine(yesterday, datetime.min.time())
-        end_date = datetime.combine(yesterday, datetime.max.time())
-    elif st.session_state.get('date_filter') == "this_week":
-        start_of_week = today - timedelta(days=today.weekday())
-        start_date = datetime.combine(start_of_week, datetime.min.time())
-        end_date = datetime.combine(today, datetime.max.time())
-    elif st.session_state.get('date_filter') == "last_week":
-        start_of_last_week = today - timedelta(days=today.weekday() + 7)
-        end_of_last_week = start_of_last_week + timedelta(days=6)
-        start_date = datetime.combine(start_of_last_week, datetime.min.time())
-        end_date = datetime.combine(end_of_last_week, datetime.max.time())
-    elif st.session_state.get('date_filter') == "this_month":
-        start_of_month = today.replace(day=1)
-        start_date = datetime.combine(start_of_month, datetime.min.time())
-        end_date = datetime.combine(today, datetime.max.time())
-    elif st.session_state.get('date_filter') == "last_month":
-        first_of_this_month = today.replace(day=1)
-        last_month = first_of_this_month - timedelta(days=1)
-        start_of_last_month = last_month.replace(day=1)
-        start_date = datetime.combine(start_of_last_month, datetime.min.time())
-        end_date = datetime.combine(last_month, datetime.max.time())
-    elif st.session_state.get('date_filter') == "this_year":
-        start_of_year = today.replace(month=1, day=1)
-        start_date = datetime.combine(start_of_year, datetime.min.time())
-        end_date = datetime.combine(today, datetime.max.time())
-    elif st.session_state.get('date_filter') == "last_year":
-        start_of_last_year = today.replace(year=today.year-1, month=1, day=1)
-        end_of_last_year = today.replace(year=today.year-1, month=12, day=31)
-        start_date = datetime.combine(start_of_last_year, datetime.min.time())
-        end_date = datetime.combine(end_of_last_year, datetime.max.time())
+    if quick_range:
+        start_day, end_day = quick_range(today)
+        start_date = datetime.combine(start_day, datetime.min.time())
+        end_date = datetime.combine(end_day, datetime.max.time())
     else:
         # Default to full date range or custom date picker
         min_date = trades_df['opened_at'].min().date() if 'opened_at' in trades_df.columns else today
@@ -826,8 +989,8 @@ def main():
     
     # Show active filters
     active_filters = []
-    if st.session_state.get('date_filter'):
-        active_filters.append(f"📅 {st.session_state.date_filter.replace('_', ' ').title()}")
+    if date_filter:
+        active_filters.append(f"📅 {date_filter.replace('_', ' ').title()}")
     if selected_symbols:
         active_filters.append(f"🎯 {len(selected_symbols)} symbol(s)")
     if selected_tags:
@@ -838,17 +1001,16 @@ def main():
         for filter_name in active_filters:
             st.sidebar.markdown(f"• {filter_name}")
         
-        if st.sidebar.button("🗑️ Clear All Filters"):
-            st.session_state.date_filter = None
-            st.session_state.symbol_filter = []
-            st.session_state.tag_filter = []
-            st.rerun()
+        st.sidebar.button("🗑️ Clear All Filters", on_click=_clear_filters)
     
     # Apply filters
-    filtered_df = filter_trades(trades_df, selected_symbols, selected_tags, start_date, end_date)
+    filter_key = (selected_account, tuple(sorted(selected_symbols)),
+                  tuple(sorted(selected_tags)), start_date, end_date)
+    filtered_df = load_filtered_trades(*filter_key)
     
-    # Show add trade form if requested
-    if st.session_state.get('show_add_form', False) and selected_account:
+    # Show add trade form if requested; an empty account already rendered it above,
+    # and declaring the same form key twice in one run is a duplicate-id error
+    if st.session_state.get('show_add_form', False) and selected_account and not trades_df.empty:
         st.markdown("---")
         show_add_trade_form(selected_account)
         st.markdown("---")
@@ -858,7 +1020,9 @@ def main():
         st.warning("No trades match your filters.")
         return
       # Calculate stats for use in tabs
-    stats = calculate_portfolio_stats(filtered_df)
+    stats = load_filtered_stats(*filter_key)
+    # Derived from the frame being rendered (vectorized), so keys and rows always align
+    time_keys = trade_time_keys(filtered_df)
     
     # Stats Tab - Portfolio Performance Overview
     with tab0:
@@ -1089,12 +1253,14 @@ def main():
     
     # Charts Tab
     with tab1:
+        # Chart builders are memoized on their inputs, so reruns that leave the
+        # filtered data unchanged (e.g. calendar navigation) reuse the figures
         col1, col2 = st.columns(2)
         
         with col1:
             # Equity curve
             st.subheader("📈 Equity Curve")
-            equity_fig = create_equity_curve(filtered_df)
+            equity_fig = create_equity_curve(narrow(filtered_df, EQUITY_CURVE_COLUMNS))
             st.plotly_chart(equity_fig, use_container_width=True)
         
         with col2:
@@ -1103,10 +1269,7 @@ def main():
                 st.subheader("📊 P&L Distribution")
                 pnl_col = 'realized_pnl' if 'realized_pnl' in filtered_df.columns else 'pnl'
                 
-                fig_hist = px.histogram(filtered_df, x=pnl_col, nbins=20,
-                                       title="P&L Distribution",
-                                       labels={pnl_col: 'P&L ($)'})
-                fig_hist.update_layout(height=400, showlegend=False)
+                fig_hist = create_pnl_histogram(filtered_df[pnl_col].to_numpy())
                 st.plotly_chart(fig_hist, use_container_width=True)
         
         # Additional charts row
@@ -1116,16 +1279,7 @@ def main():
             # Win/Loss pie chart
             if 'realized_pnl' in filtered_df.columns or 'pnl' in filtered_df.columns:
                 pnl_col = 'realized_pnl' if 'realized_pnl' in filtered_df.columns else 'pnl'
-                wins = filtered_df[filtered_df[pnl_col] > 0]
-                losses = filtered_df[filtered_df[pnl_col] <= 0]
-                
-                fig_pie = go.Figure(data=[go.Pie(
-                    labels=['Wins', 'Losses'],
-                    values=[len(wins), len(losses)],
-                    hole=0.4,
-                    marker_colors=['#28a745', '#dc3545']
-                )])
-                fig_pie.update_layout(title="Win/Loss Ratio", height=400)
+                fig_pie = create_win_loss_pie(filtered_df[pnl_col].to_numpy())
                 st.plotly_chart(fig_pie, use_container_width=True)
         
         with col4:
@@ -1134,170 +1288,14 @@ def main():
                 pnl_col = 'realized_pnl'
                 date_col = 'closed_at' if 'closed_at' in filtered_df.columns else 'opened_at'
                 
-                # Create monthly P&L chart
-                df_monthly = filtered_df.dropna(subset=[date_col, pnl_col]).copy()
-                if not df_monthly.empty:
-                    df_monthly['month'] = df_monthly[date_col].dt.to_period('M')
-                    monthly_pnl = df_monthly.groupby('month')[pnl_col].sum().reset_index()
-                    monthly_pnl['month_str'] = monthly_pnl['month'].astype(str)
-                    
-                    fig_monthly = px.bar(monthly_pnl, x='month_str', y=pnl_col,
-                                        title="Monthly P&L",
-                                        labels={pnl_col: 'P&L ($)', 'month_str': 'Month'})
-                    fig_monthly.update_layout(height=400, showlegend=False)
-                    # Color bars based on positive/negative
-                    colors = ['#28a745' if x >= 0 else '#dc3545' for x in monthly_pnl[pnl_col]]
-                    fig_monthly.update_traces(marker_color=colors)
+                # Only the two columns the chart needs; incomplete rows are masked inside
+                fig_monthly = create_monthly_pnl_chart(filtered_df[date_col].to_numpy(dtype='datetime64[ns]'),
+                                                       filtered_df[pnl_col].to_numpy(dtype=np.float64))
+                if fig_monthly is not None:
                     st.plotly_chart(fig_monthly, use_container_width=True)
     
     with tab2:
-        # Recent trades table
-        st.subheader("📋 Recent Trades")
-        st.markdown("*Click on a row to view trade legs below*")
-        
-        # Select relevant columns for display
-        display_cols = []
-        available_cols = filtered_df.columns.tolist()
-        
-        # Common columns to show with their preferred order
-        preferred_cols = [
-            'asset_symbol', 'symbol',  # Symbol columns
-            'status', 'realized_pnl', 'pnl',  # P&L columns
-            'avg_buy_price', 'avg_sell_price', 'total_fees',  # Price columns
-            'opened_at', 'closed_at',  # Date columns
-            'tags', 'notes'  # Additional info
-        ]
-        
-        for col in preferred_cols:
-            if col in available_cols and col not in display_cols:
-                display_cols.append(col)
-        
-        # Add any remaining important columns
-        for col in available_cols:
-            if col not in display_cols and col not in ['id', 'user_id', 'account_id', 'trade_id', 'created_at', 'updated_at']:
-                display_cols.append(col)
-        
-        # Limit to first 10 columns if too many
-        display_cols = display_cols[:10]
-        
-        if not filtered_df.empty and 'id' in filtered_df.columns:
-            if display_cols:
-                display_df = filtered_df[display_cols].head(20).copy()
-                
-                # Store the original trade IDs for selection mapping
-                trade_ids = filtered_df['id'].head(20).tolist()
-                
-                # Format numeric columns
-                for col in display_df.columns:
-                    if display_df[col].dtype in ['float64', 'float32']:
-                        if any(keyword in col.lower() for keyword in ['price', 'pnl', 'fee']):
-                            display_df[col] = display_df[col].round(2)
-                            # Format as currency for P&L columns
-                            if 'pnl' in col.lower():
-                                display_df[col] = display_df[col].apply(lambda x: f"${x:,.2f}" if pd.notna(x) else "")
-                            else:
-                                display_df[col] = display_df[col].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "")
-                
-                # Format date columns
-                for col in display_df.columns:
-                    if 'at' in col.lower() and display_df[col].dtype == 'datetime64[ns]':
-                        display_df[col] = display_df[col].dt.strftime('%Y-%m-%d %H:%M')
-                
-                # Use st.dataframe with selection mode
-                selected_rows = st.dataframe(
-                    display_df, 
-                    use_container_width=True,
-                    on_select="rerun",
-                    selection_mode="single-row",
-                    key="trades_table"
-                )
-                
-                # Check if a row is selected
-                if selected_rows['selection']['rows']:
-                    selected_idx = selected_rows['selection']['rows'][0]
-                    if selected_idx < len(trade_ids):
-                        selected_trade_id = trade_ids[selected_idx]
-                        
-                        # Show trade legs for selected trade
-                        st.markdown("---")
-                        st.subheader("🔍 Trade Legs for Selected Trade")
-                        
-                        # Get trade info for display
-                        selected_trade = filtered_df[filtered_df['id'] == selected_trade_id].iloc[0]
-                        symbol = selected_trade.get('asset_symbol', selected_trade.get('symbol', 'N/A'))
-                        pnl = selected_trade.get('realized_pnl', selected_trade.get('pnl', 0))
-                        opened_at = selected_trade.get('opened_at', 'N/A')
-                        
-                        # Format trade info
-                        if pd.notna(opened_at) and hasattr(opened_at, 'strftime'):
-                            date_str = opened_at.strftime('%Y-%m-%d %H:%M')
-                        else:
-                            date_str = str(opened_at)[:16] if str(opened_at) != 'N/A' else 'N/A'
-                        
-                        pnl_str = f"${pnl:,.2f}" if pd.notna(pnl) else "$0.00"
-                        
-                        st.info(f"**Trade:** {symbol} | **Date:** {date_str} | **P&L:** {pnl_str} | **ID:** {selected_trade_id}")
-                        
-                        # Load and display trade legs
-                        with st.spinner("Loading trade legs..."):
-                            legs_df = load_trade_legs(selected_trade_id)
-                        
-                        if not legs_df.empty:
-                            # Format the legs dataframe for display
-                            display_legs_df = legs_df.copy()
-                            
-                            # Format numeric columns
-                            for col in display_legs_df.columns:
-                                if display_legs_df[col].dtype in ['float64', 'float32']:
-                                    if any(keyword in col.lower() for keyword in ['price', 'amount', 'fee', 'value']):
-                                        display_legs_df[col] = display_legs_df[col].round(4)
-                                        # Format as currency for price/amount columns
-                                        if 'price' in col.lower():
-                                            display_legs_df[col] = display_legs_df[col].apply(lambda x: f"${x:.4f}" if pd.notna(x) else "")
-                                        elif 'amount' in col.lower() or 'value' in col.lower():
-                                            display_legs_df[col] = display_legs_df[col].apply(lambda x: f"${x:,.2f}" if pd.notna(x) else "")
-                                        elif 'fee' in col.lower():
-                                            display_legs_df[col] = display_legs_df[col].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "")
-                            
-                            # Format date columns
-                            for col in display_legs_df.columns:
-                                if 'at' in col.lower() and display_legs_df[col].dtype == 'datetime64[ns]':
-                                    display_legs_df[col] = display_legs_df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-                            
-                            st.dataframe(display_legs_df, use_container_width=True)
-                            
-                            # Add some basic stats about the legs
-                            if len(legs_df) > 0:
-                                col1, col2, col3, col4 = st.columns(4)
-                                with col1:
-                                    st.metric("Total Legs", len(legs_df))
-                                with col2:
-                                    if 'side' in legs_df.columns:
-                                        buy_count = len(legs_df[legs_df['side'].str.upper() == 'BUY'])
-                                        st.metric("Buy Orders", buy_count)
-                                with col3:
-                                    if 'side' in legs_df.columns:
-                                        sell_count = len(legs_df[legs_df['side'].str.upper() == 'SELL'])
-                                        st.metric("Sell Orders", sell_count)
-                                with col4:
-                                    if 'quantity' in legs_df.columns:
-                                        total_qty = legs_df['quantity'].sum()
-                                        st.metric("Total Quantity", f"{total_qty:,.0f}")
-                        else:
-                            st.warning("No trade legs found for this trade.")
-                else:
-                    st.info("👆 Click on a row in the table above to view its trade legs")
-            else:
-                # Fallback if no display columns
-                selected_rows = st.dataframe(
-                    filtered_df.head(20), 
-                    use_container_width=True,
-                    on_select="rerun",
-                    selection_mode="single-row",
-                    key="trades_table_fallback"
-                )
-        else:
-            st.info("No trades available to display.")
+        render_trades_tab(filtered_df)
     
     with tab3:
         st.subheader("📊 Advanced Analytics")
@@ -1306,16 +1304,24 @@ def main():
             st.info("No data available for analytics. Please adjust your filters.")
             return
         
+        import plotly.express as px  # only needed once there is data to chart
+        
         # Top section: Key Performance Metrics
         st.markdown("#### 🎯 Performance Overview")
         
+        # Extract the P&L array once; every metric below reads it, and one drawdown
+        # pass is shared by the recovery factor and the risk analysis
+        if 'realized_pnl' in filtered_df.columns:
+            pnl_values = filtered_df['realized_pnl'].to_numpy()
+            max_dd = max_drawdown(pnl_values)
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             # Risk/Reward Ratio
             if 'realized_pnl' in filtered_df.columns:
-                wins = filtered_df[filtered_df['realized_pnl'] > 0]['realized_pnl']
-                losses = filtered_df[filtered_df['realized_pnl'] < 0]['realized_pnl']
+                wins = pnl_values[pnl_values > 0]
+                losses = pnl_values[pnl_values < 0]
                 risk_reward = abs(wins.mean() / losses.mean()) if len(losses) > 0 and len(wins) > 0 else 0
                 rr_color = "normal" if risk_reward >= 1.0 else "inverse"
                 st.metric(
@@ -1329,8 +1335,7 @@ def main():
         with col2:
             # Sharpe Ratio approximation (using daily returns)
             if 'realized_pnl' in filtered_df.columns:
-                daily_returns = filtered_df['realized_pnl']
-                sharpe = daily_returns.mean() / daily_returns.std() if daily_returns.std() > 0 else 0
+                sharpe = return_volatility_ratio(pnl_values)
                 sharpe_color = "normal" if sharpe > 0 else "inverse"
                 st.metric(
                     "Return/Volatility",
@@ -1343,9 +1348,7 @@ def main():
         with col3:
             # Recovery Factor
             if 'realized_pnl' in filtered_df.columns:
-                total_pnl = filtered_df['realized_pnl'].sum()
-                max_drawdown = filtered_df['realized_pnl'].cumsum().expanding().max() - filtered_df['realized_pnl'].cumsum()
-                max_dd = max_drawdown.max() if len(max_drawdown) > 0 else 1
+                total_pnl = np.nansum(pnl_values)
                 recovery_factor = total_pnl / max_dd if max_dd > 0 else 0
                 rf_color = "normal" if recovery_factor > 0 else "inverse"
                 st.metric(
@@ -1359,10 +1362,12 @@ def main():
         with col4:
             # Trade Frequency
             if 'opened_at' in filtered_df.columns:
-                df_with_dates = filtered_df.dropna(subset=['opened_at'])
-                if not df_with_dates.empty:
-                    date_range = (df_with_dates['opened_at'].max() - df_with_dates['opened_at'].min()).days
-                    frequency = len(df_with_dates) / max(date_range, 1) * 30  # trades per month
+                # count/min/max skip NaT, so no dropna copy of the frame is needed
+                opened = filtered_df['opened_at']
+                dated_trades = opened.count()
+                if dated_trades:
+                    date_range = (opened.max() - opened.min()).days
+                    frequency = dated_trades / max(date_range, 1) * 30  # trades per month
                     st.metric(
                         "Monthly Frequency",
                         f"{frequency:.1f}",
@@ -1378,14 +1383,15 @@ def main():
             # Enhanced Symbol Performance
             st.markdown("#### 📈 Symbol Performance Analysis")
             if 'asset_symbol' in filtered_df.columns and 'realized_pnl' in filtered_df.columns:
-                symbol_analysis = filtered_df.groupby('asset_symbol').agg({
+                symbol_analysis = filtered_df.groupby('asset_symbol', observed=True).agg({
                     'realized_pnl': ['sum', 'count', 'mean', 'std'],
                     'id': 'count'
                 }).round(2)
                 
                 # Flatten column names
                 symbol_analysis.columns = ['Total P&L', 'PnL Count', 'Avg P&L', 'P&L Std', 'Trade Count']
-                symbol_analysis['Win Rate'] = filtered_df.groupby('asset_symbol')['realized_pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
+                # Win rate as a grouped mean of a boolean column, not a Python lambda per group
+                symbol_analysis['Win Rate'] = filtered_df['realized_pnl'].gt(0).groupby(filtered_df['asset_symbol'], observed=True).mean().mul(100).round(1)
                 symbol_analysis['Sharpe'] = (symbol_analysis['Avg P&L'] / symbol_analysis['P&L Std']).fillna(0).round(2)
                 
                 # Sort by total P&L
@@ -1420,37 +1426,25 @@ def main():
             # PnL by Tags Analysis
             st.markdown("#### 🏷️ Tag Performance Analysis")
             if 'tags' in filtered_df.columns and 'realized_pnl' in filtered_df.columns:
-                # Process tags (handle both string and list formats)
-                tag_rows = []
-                for _, row in filtered_df.iterrows():
-                    tags = row['tags']
-                    if pd.isna(tags) or tags == '':
-                        continue
-                    
-                    if isinstance(tags, str):
-                        tag_list = [t.strip() for t in tags.split(',') if t.strip()]
-                    elif isinstance(tags, list):
-                        tag_list = tags
-                    else:
-                        continue
-                    
-                    for tag in tag_list:
-                        tag_rows.append({
-                            'tag': tag,
-                            'pnl': row['realized_pnl'],
-                            'trade_id': row['id']
-                        })
+                # One row per (trade, tag): split the comma-separated tags and explode,
+                # instead of building rows with iterrows
+                tag_df = pd.DataFrame({
+                    'tag': filtered_df['tags'].str.split(','),
+                    'pnl': filtered_df['realized_pnl'],
+                    'trade_id': filtered_df['id'],
+                }).explode('tag')
+                tag_df['tag'] = tag_df['tag'].str.strip()
+                tag_df = tag_df[tag_df['tag'].notna() & (tag_df['tag'] != '')]
                 
-                if tag_rows:
-                    tag_df = pd.DataFrame(tag_rows)
-                    tag_stats = tag_df.groupby('tag').agg({
-                        'pnl': ['sum', 'count', 'mean'],
-                        'trade_id': 'nunique'
-                    }).round(2)
-                    
-                    # Flatten columns
-                    tag_stats.columns = ['Total P&L', 'Entries', 'Avg P&L', 'Unique Trades']
-                    tag_stats['Win Rate'] = tag_df.groupby('tag')['pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
+                if not tag_df.empty:
+                    # Every column, win rate included, from one named aggregation pass
+                    tag_stats = tag_df.assign(win_pct=tag_df['pnl'].gt(0) * 100.0).groupby('tag').agg(**{
+                        'Total P&L': ('pnl', 'sum'),
+                        'Entries': ('pnl', 'count'),
+                        'Avg P&L': ('pnl', 'mean'),
+                        'Unique Trades': ('trade_id', 'nunique'),
+                        'Win Rate': ('win_pct', 'mean'),
+                    }).round({'Total P&L': 2, 'Avg P&L': 2, 'Win Rate': 1})
                     tag_stats = tag_stats.sort_values('Total P&L', ascending=False).reset_index()
                     
                     st.write("**Performance by Tag**")
@@ -1487,17 +1481,16 @@ def main():
             # Monthly Performance Analysis
             st.markdown("#### 📅 Monthly Performance Trends")
             if 'opened_at' in filtered_df.columns and 'realized_pnl' in filtered_df.columns:
-                df_monthly = filtered_df.dropna(subset=['opened_at']).copy()
-                if not df_monthly.empty:
-                    df_monthly['month'] = df_monthly['opened_at'].dt.to_period('M')
-                    monthly_stats = df_monthly.groupby('month').agg({
-                        'realized_pnl': ['sum', 'count', 'mean'],
-                    }).round(2)
+                monthly_pnl = filtered_df['realized_pnl'][filtered_df['opened_at'].notna()]
+                if not monthly_pnl.empty:
+                    month = pd.Series(time_keys.month, index=filtered_df.index, name='month')
+                    monthly_stats = monthly_pnl.groupby(month).agg(['sum', 'count', 'mean']).round(2)
                     
                     monthly_stats.columns = ['Total P&L', 'Trades', 'Avg P&L']
-                    monthly_stats['Win Rate'] = df_monthly.groupby('month')['realized_pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
+                    monthly_stats['Win Rate'] = (monthly_pnl > 0).groupby(month).mean().mul(100).round(1)
                     monthly_stats = monthly_stats.reset_index()
-                    monthly_stats['month'] = monthly_stats['month'].astype(str)
+                    monthly_stats['month'] = np.datetime_as_string(
+                        monthly_stats['month'].to_numpy().astype('datetime64[M]'))
                     
                     if len(monthly_stats) > 1:
                         fig_monthly = px.line(
@@ -1522,28 +1515,20 @@ def main():
             # Day of Week Analysis
             st.markdown("#### 📊 Day of Week Performance")
             if 'opened_at' in filtered_df.columns:
-                df_with_dates = filtered_df.dropna(subset=['opened_at']).copy()
-                if not df_with_dates.empty:
-                    df_with_dates['day_of_week'] = df_with_dates['opened_at'].dt.day_name()
-                    
+                has_date = ~np.isnat(time_keys.day)
+                if has_date.any():
                     # Performance by day
-                    if 'realized_pnl' in df_with_dates.columns:
-                        day_performance = df_with_dates.groupby('day_of_week').agg({
-                            'realized_pnl': ['sum', 'count', 'mean'],
-                        }).round(2)
-                        day_performance.columns = ['Total P&L', 'Trades', 'Avg P&L']
-                        day_performance['Win Rate'] = df_with_dates.groupby('day_of_week')['realized_pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
-                        
-                        # Reorder by weekday
-                        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        day_performance = day_performance.reindex([day for day in day_order if day in day_performance.index])
+                    if 'realized_pnl' in filtered_df.columns:
+                        weekdays, day_pnl = weekday_totals(time_keys.day[has_date],
+                                                           filtered_df['realized_pnl'].to_numpy()[has_date])
+                        day_pnl = day_pnl.round(2)
                         
                         fig_dow = px.bar(
-                            day_performance.reset_index(),
-                            x='day_of_week',
-                            y='Total P&L',
+                            x=np.array(calendar.day_name)[weekdays],
+                            y=day_pnl,
                             title="P&L by Day of Week",
-                            color='Total P&L',
+                            color=day_pnl,
+                            labels={'x': 'day_of_week', 'y': 'Total P&L', 'color': 'Total P&L'},
                             color_continuous_scale=['red', 'yellow', 'green']
                         )
                         fig_dow.update_layout(height=300, showlegend=False)
@@ -1555,19 +1540,13 @@ def main():
             if 'realized_pnl' in filtered_df.columns:
                 pnl_series = filtered_df['realized_pnl']
                 
-                # Drawdown analysis
-                cumulative_pnl = pnl_series.cumsum()
-                running_max = cumulative_pnl.expanding().max()
-                drawdown = running_max - cumulative_pnl
-                max_drawdown = drawdown.max()
-                
                 # Risk metrics
                 col4a, col4b = st.columns(2)
                 with col4a:
                     st.metric(
                         "Max Drawdown",
-                        f"${max_drawdown:.2f}",
-                        delta=f"-${max_drawdown:.2f}",
+                        f"${max_dd:.2f}",
+                        delta=f"-${max_dd:.2f}",
                         delta_color="inverse",
                         help="Maximum peak-to-trough decline"
                     )
@@ -1583,17 +1562,20 @@ def main():
                     )
                 
                 # P&L Distribution Analysis
-                fig_dist = px.histogram(
-                    filtered_df,
-                    x='realized_pnl',
-                    nbins=25,
-                    title="P&L Distribution",
-                    labels={'realized_pnl': 'P&L ($)', 'count': 'Frequency'}
-                )
-                fig_dist.add_vline(x=pnl_series.mean(), line_dash="dash", 
-                                 annotation_text=f"Mean: ${pnl_series.mean():.2f}")
-                fig_dist.add_vline(x=pnl_series.median(), line_dash="dot", 
-                                 annotation_text=f"Median: ${pnl_series.median():.2f}")
+                # Pre-binned like the dashboard histogram: 25 bars instead of every trade
+                centers, counts, widths = histogram_bars(pnl_values, 25)
+                fig_dist = go.Figure({
+                    'data': [{'type': 'bar', 'x': centers, 'y': counts, 'width': widths,
+                              'hovertemplate': 'P&L ($)=%{x:.2f}<br>count=%{y}<extra></extra>'}],
+                    'layout': {'title': {'text': "P&L Distribution"},
+                               'xaxis': {'title': {'text': 'P&L ($)'}}, 'yaxis': {'title': {'text': 'count'}},
+                               'bargap': 0},
+                })
+                pnl_mean, pnl_median = pnl_series.mean(), pnl_series.median()
+                fig_dist.add_vline(x=pnl_mean, line_dash="dash", 
+                                 annotation_text=f"Mean: ${pnl_mean:.2f}")
+                fig_dist.add_vline(x=pnl_median, line_dash="dot", 
+                                 annotation_text=f"Median: ${pnl_median:.2f}")
                 fig_dist.update_layout(height=300)
                 st.plotly_chart(fig_dist, use_container_width=True)
                 
@@ -1624,6 +1606,7 @@ def main():
             st.markdown("#### 🥧 Asset Allocation")
             if 'asset_type' in filtered_df.columns:
                 asset_counts = filtered_df['asset_type'].value_counts()
+                asset_counts = asset_counts[asset_counts > 0]  # drop unobserved categories
                 if not asset_counts.empty:
                     colors = ['#1AA9E5', '#00FFCC', '#FF4C6A', '#FFA500', '#9966CC']
                     fig_allocation = go.Figure(go.Pie(
@@ -1641,11 +1624,11 @@ def main():
                     
                     # Asset performance table
                     if 'realized_pnl' in filtered_df.columns:
-                        asset_performance = filtered_df.groupby('asset_type').agg({
+                        asset_performance = filtered_df.groupby('asset_type', observed=True).agg({
                             'realized_pnl': ['sum', 'count', 'mean'],
                         }).round(2)
                         asset_performance.columns = ['Total P&L', 'Trades', 'Avg P&L']
-                        asset_performance['Win Rate'] = filtered_df.groupby('asset_type')['realized_pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
+                        asset_performance['Win Rate'] = filtered_df['realized_pnl'].gt(0).groupby(filtered_df['asset_type'], observed=True).mean().mul(100).round(1)
                         
                         st.write("**Performance by Asset Type**")
                         st.dataframe(
@@ -1659,10 +1642,13 @@ def main():
             # Trade Duration vs P&L Analysis
             st.markdown("#### ⏱️ Duration vs Performance")
             if 'opened_at' in filtered_df.columns and 'closed_at' in filtered_df.columns and 'realized_pnl' in filtered_df.columns:
-                duration_df = filtered_df.dropna(subset=['opened_at', 'closed_at']).copy()
+                # Only the two derived columns are needed, so build a narrow frame instead of copying
+                has_dates = filtered_df['opened_at'].notna() & filtered_df['closed_at'].notna()
+                duration_df = pd.DataFrame({
+                    'duration_days': (filtered_df['closed_at'] - filtered_df['opened_at'])[has_dates].dt.total_seconds() / (24 * 3600),
+                    'realized_pnl': filtered_df['realized_pnl'][has_dates],
+                })
                 if not duration_df.empty:
-                    duration_df['duration_days'] = (duration_df['closed_at'] - duration_df['opened_at']).dt.total_seconds() / (24 * 3600)
-                    
                     # Duration bins analysis
                     duration_df['duration_bin'] = pd.cut(
                         duration_df['duration_days'], 
@@ -1674,7 +1660,7 @@ def main():
                         'realized_pnl': ['sum', 'count', 'mean'],
                     }).round(2)
                     duration_analysis.columns = ['Total P&L', 'Trades', 'Avg P&L']
-                    duration_analysis['Win Rate'] = duration_df.groupby('duration_bin')['realized_pnl'].apply(lambda x: (x > 0).mean() * 100).round(1)
+                    duration_analysis['Win Rate'] = duration_df['realized_pnl'].gt(0).groupby(duration_df['duration_bin']).mean().mul(100).round(1)
                     
                     st.write("**Performance by Hold Duration**")
                     st.dataframe(
@@ -1683,8 +1669,13 @@ def main():
                     )
                     
                     # Scatter plot: Duration vs P&L
-                    sample_size = min(200, len(duration_df))  # Limit points for performance
-                    duration_sample = duration_df.sample(n=sample_size) if len(duration_df) > sample_size else duration_df
+                    # Limit points for performance with LTTB over duration order, which keeps the
+                    # P&L extremes a random sample can drop and gives the same points every run
+                    duration_sample = duration_df.sort_values('duration_days', kind='stable')
+                    if len(duration_sample) > DURATION_SCATTER_MAX_POINTS:
+                        keep = lttb(duration_sample['duration_days'].to_numpy(),
+                                    duration_sample['realized_pnl'].to_numpy(), DURATION_SCATTER_MAX_POINTS)
+                        duration_sample = duration_sample.iloc[keep]
                     
                     fig_duration = px.scatter(
                         duration_sample,
@@ -1704,38 +1695,31 @@ def main():
     with tab4:
         # Calendar view
         st.subheader("🗓️ Trade Calendar")
-          # Initialize calendar state
-        if 'cal_year' not in st.session_state:
-            st.session_state.cal_year = datetime.now().year
-        if 'cal_month' not in st.session_state:
-            st.session_state.cal_month = datetime.now().month
-        
-        # Month selection controls
+          # Initialize calendar state and read it once; callbacks below update it
+        # before the next run, so locals stay valid for the whole tab
+        now = datetime.now()
+        cal_year = st.session_state.setdefault('cal_year', now.year)
+        cal_month = st.session_state.setdefault('cal_month', now.month)
+        st.session_state.setdefault('calendar_date_picker', datetime(cal_year, cal_month, 1).date())
+        
+        # Month selection controls (state is updated in callbacks, so no extra rerun)
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col1:
-            if st.button("📅 Today", key="cal_today"):
-                st.session_state.cal_year = datetime.now().year
-                st.session_state.cal_month = datetime.now().month
-                st.rerun()
+            st.button("📅 Today", key="cal_today", on_click=_calendar_today)
         
         with col2:
             # Month/Year selector
-            selected_date = st.date_input(
+            st.date_input(
                 "Select Month/Year",
-                value=datetime(st.session_state.cal_year, st.session_state.cal_month, 1),
-                key="calendar_date_picker"
+                key="calendar_date_picker",
+                on_change=_calendar_date_picked
             )
-            
-            if selected_date:
-                if (selected_date.year != st.session_state.cal_year or 
-                    selected_date.month != st.session_state.cal_month):
-                    st.session_state.cal_year = selected_date.year
-                    st.session_state.cal_month = selected_date.month
-                    st.rerun()
         
         # Create and display calendar
-        calendar_data = create_calendar_data(filtered_df, st.session_state.cal_year, st.session_state.cal_month)
+        # The month's trades feed both the calendar grid and the summary below
+        month_trades = get_trades_by_day(filtered_df, cal_year, cal_month, time_keys)
+        calendar_data = create_calendar_data(filtered_df, cal_year, cal_month, month_trades)
         
         if calendar_data['weeks']:
             render_calendar(calendar_data)
@@ -1745,7 +1729,6 @@ def main():
             st.subheader("📈 Monthly Summary")
             
             # Calculate monthly totals
-            month_trades = get_trades_by_day(filtered_df, st.session_state.cal_year, st.session_state.cal_month)
             if not month_trades.empty:
                 pnl_col = 'realized_pnl' if 'realized_pnl' in month_trades.columns else 'pnl'
                 
@@ -1787,7 +1770,7 @@ def main():
                     fig = go.Figure()
                     
                     # Add P&L bars
-                    colors = ['green' if pnl >= 0 else 'red' for pnl in daily_data['P&L']]
+                    colors = np.where(daily_data['P&L'].to_numpy() >= 0, 'green', 'red')
                     fig.add_trace(go.Bar(
                         x=daily_data['Date'],
                         y=daily_data['P&L'],
@@ -1797,7 +1780,7 @@ def main():
                     ))
                     
                     fig.update_layout(
-                        title=f"Daily P&L - {calendar.month_name[st.session_state.cal_month]} {st.session_state.cal_year}",
+                        title=f"Daily P&L - {calendar.month_name[cal_month]} {cal_year}",
                         xaxis_title="Date",
                         yaxis_title="P&L ($)",
                         height=400,
@@ -1806,7 +1789,7 @@ def main():
                     
                     st.plotly_chart(fig, use_container_width=True)
             else:
-                st.info(f"No trades found for {calendar.month_name[st.session_state.cal_month]} {st.session_state.cal_year}")
+                st.info(f"No trades found for {calendar.month_name[cal_month]} {cal_year}")
         else:
             st.error("Unable to generate calendar data")
 
@@ -1958,13 +1941,9 @@ def main():
                 
                 st.write("**Database Schema:**")
                 try:
-                    import sqlite3
-                    conn = sqlite3.connect("data/tradecraft.db")
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                    tables = cursor.fetchall()
+                    with closing(sqlite3.connect("data/tradecraft.db")) as conn:
+                        tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()
                     st.write(f"Tables: {[table[0] for table in tables]}")
-                    conn.close()
                 except Exception as e:
                     st.error(f"Could not fetch database info: {e}")
             
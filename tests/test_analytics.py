@@ -0,0 +1,102 @@
+"""
+Unit tests for array analytics kernels.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from utils import analytics
+
+
+@pytest.mark.unit
+class TestEquityDrawdown:
+    """Test equity curve and drawdown kernels."""
+
+    def test_equity_drawdown_matches_pandas(self):
+        """Test that the NumPy kernel matches the pandas cumsum/expanding-max version."""
+        pnl = pd.Series([100.0, -50.0, np.nan, -80.0, 200.0, -10.0])
+        cum, peak, drawdown = analytics.equity_drawdown(pnl.to_numpy())
+
+        expected_cum = pnl.fillna(0).cumsum()
+        expected_peak = expected_cum.expanding().max()
+        np.testing.assert_allclose(cum, expected_cum)
+        np.testing.assert_allclose(peak, expected_peak)
+        np.testing.assert_allclose(drawdown, expected_cum - expected_peak)
+
+    def test_cumulative_pnl_matches_equity_drawdown(self):
+        """Test the cumsum-only kernel matches the equity curve from equity_drawdown."""
+        pnl = np.array([10.0, np.nan, -5.0, 20.0])
+        order = np.array([3, 1, 0, 2])
+        np.testing.assert_allclose(analytics.cumulative_pnl(pnl, order),
+                                   analytics.equity_drawdown(pnl, order)[0])
+        np.testing.assert_allclose(analytics.cumulative_pnl(pnl), [10.0, 10.0, 5.0, 25.0])
+        # The input buffer is never written to
+        assert np.isnan(pnl[1]) and pnl[3] == 20.0
+
+    def test_equity_drawdown_applies_order(self):
+        """Test that trades are accumulated in the given order."""
+        pnl = np.array([10.0, 20.0, -5.0])
+        cum, _, _ = analytics.equity_drawdown(pnl, np.array([2, 0, 1]))
+        np.testing.assert_allclose(cum, [-5.0, 5.0, 25.0])
+
+    def test_max_drawdown(self):
+        """Test max drawdown is reported as a positive peak-to-trough decline."""
+        assert analytics.max_drawdown(np.array([100.0, -30.0, -40.0, 50.0])) == pytest.approx(70.0)
+        assert analytics.max_drawdown(np.array([10.0, 20.0])) == 0.0
+        assert analytics.max_drawdown(np.array([])) == 0.0
+
+    def test_return_volatility_ratio_matches_pandas(self):
+        """Test the return/volatility ratio matches pandas mean/std with NaNs skipped."""
+        pnl = pd.Series([100.0, -50.0, np.nan, 25.0, -10.0])
+        expected = pnl.mean() / pnl.std()
+        assert analytics.return_volatility_ratio(pnl.to_numpy()) == pytest.approx(expected)
+        assert analytics.return_volatility_ratio(np.array([5.0])) == 0.0
+        assert analytics.return_volatility_ratio(np.array([5.0, 5.0])) == 0.0
+
+
+@pytest.mark.unit
+class TestMonthlyTotals:
+    """Test calendar-month aggregation."""
+
+    def test_monthly_totals_matches_groupby(self):
+        """Test bincount totals match a pandas period groupby and skip empty months."""
+        dates = pd.to_datetime(['2024-11-03', '2025-01-15', '2024-11-28', '2025-01-01'])
+        pnl = np.array([10.0, -4.0, 2.5, 1.0])
+        months, totals = analytics.monthly_totals(dates.to_numpy(), pnl)
+
+        expected = pd.Series(pnl).groupby(dates.to_period('M')).sum()
+        assert list(np.datetime_as_string(months)) == [str(p) for p in expected.index]
+        np.testing.assert_allclose(totals, expected.to_numpy())
+
+    def test_monthly_totals_empty(self):
+        """Test empty input yields empty outputs."""
+        months, totals = analytics.monthly_totals(np.array([], dtype='datetime64[ns]'), np.array([]))
+        assert len(months) == 0 and len(totals) == 0
+
+
+@pytest.mark.unit
+class TestHistogramBars:
+    """Test server-side histogram binning."""
+
+    def test_histogram_bars_ignores_nan(self):
+        """Test bins cover the data, counts sum to the non-NaN values and widths are equal."""
+        values = np.array([-10.0, -2.0, 0.0, 3.0, 10.0, np.nan])
+        centers, counts, widths = analytics.histogram_bars(values, 4)
+
+        assert counts.sum() == 5
+        np.testing.assert_allclose(widths, 5.0)
+        np.testing.assert_allclose(centers, [-7.5, -2.5, 2.5, 7.5])
+
+
+@pytest.mark.unit
+class TestWeekdayTotals:
+    """Test day-of-week aggregation."""
+
+    def test_weekday_totals_matches_groupby(self):
+        """Test bincount totals match a pandas weekday groupby, with NaN P&L counted as zero."""
+        dates = pd.to_datetime(['2025-06-02', '2025-06-09', '2025-06-04', '2025-06-08', '2025-06-05'])
+        pnl = np.array([10.0, -3.0, 5.0, 7.0, np.nan])
+        weekdays, totals = analytics.weekday_totals(dates.to_numpy(), pnl)
+
+        expected = pd.Series(pnl).groupby(dates.dayofweek).sum()
+        np.testing.assert_array_equal(weekdays, expected.index)
+        np.testing.assert_allclose(totals, expected.to_numpy())
@@ -0,0 +1,34 @@
+"""
+Unit tests for timestamp parsing.
+"""
+import pandas as pd
+import pytest
+from utils.dates import to_datetime_cached
+
+
+@pytest.mark.unit
+class TestToDatetimeCached:
+    """Test per-distinct-value timestamp parsing."""
+
+    def test_matches_to_datetime_for_iso_strings(self):
+        """Test repeated ISO strings, None and garbage parse like pd.to_datetime."""
+        s = pd.Series(['2026-07-20T15:24:00+00:00', None, '2026-07-20T15:24:00+00:00',
+                       'garbage', '2026-07-21T21:38:00+00:00'], name='opened_at')
+        result = to_datetime_cached(s)
+
+        pd.testing.assert_series_equal(result, pd.to_datetime(s, errors='coerce'))
+
+    def test_mixed_aware_and_naive_strings_coerce_to_nat(self):
+        """Test mixing offset-aware and naive strings yields NaT instead of raising."""
+        s = pd.Series(['2026-07-20T15:24:00+00:00', '2026-07-21 09:30:00',
+                       '2026-07-20T15:24:00+00:00', None])
+        result = to_datetime_cached(s)
+
+        assert isinstance(result.dtype, pd.DatetimeTZDtype) and str(result.dt.tz) == 'UTC'
+        assert result[0] == result[2] == pd.Timestamp('2026-07-20 15:24:00', tz='UTC')
+        assert result[[1, 3]].isna().all()
+
+    def test_datetime_column_passes_through(self):
+        """Test already-parsed columns are returned as is."""
+        s = pd.Series(pd.to_datetime(['2026-07-20', '2026-07-21']))
+        assert to_datetime_cached(s) is s
@@ -1,6 +1,8 @@
 """
 Unit tests for database access functions.
 """
+import sqlite3
+import threading
 import pytest
 import pandas as pd
 from utils import db_access
@@ -10,6 +12,41 @@ from utils import db_access
 class TestDatabaseAccess:
     """Test database access functions."""
     
+    def test_get_connection_is_owned_by_caller(self, test_db):
+        """Test that get_connection returns a fresh connection the caller may close."""
+        conn = db_access.get_connection(test_db)
+        conn.close()
+        
+        other = db_access.get_connection(test_db)
+        assert other is not conn
+        assert other.execute('SELECT 1').fetchone() == (1,)
+        other.close()
+    
+    def test_cached_connection_reused_per_thread(self, test_db):
+        """Test that helper connections are reused within a thread but not across threads."""
+        conn = db_access._cached_connection(test_db)
+        
+        assert db_access._cached_connection(test_db) is conn
+        assert conn.row_factory is None
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db_access._cached_connection(test_db)))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+    
+    def test_cached_connection_reopens_after_close(self, test_db):
+        """Test that closing the cached connection does not break later helper calls."""
+        db_access._cached_connection(test_db).close()
+        
+        assert db_access._cached_connection(test_db).execute('SELECT 1').fetchone() == (1,)
+        assert len(db_access.fetch_trades_for_user("alice", test_db)) > 0
+    
+    def test_helpers_leave_shared_row_factory_untouched(self, test_db):
+        """Test that dict-returning helpers set Row on their cursor, not the shared connection."""
+        db_access.fetch_trades_for_user("alice", test_db)
+        assert db_access._cached_connection(test_db).row_factory is None
+    
     def test_fetch_trades_for_user(self, test_db):
         """Test fetching trades for a user."""
         trades = db_access.fetch_trades_for_user("alice", test_db)
@@ -69,6 +106,43 @@ class TestDatabaseAccess:
         assert analytics['total_bought'] >= 0
         assert analytics['total_sold'] >= 0
     
+    def test_fetch_trade_analytics_matches_trade_analytics(self, test_db):
+        """Test that the grouped analytics query agrees with per-trade analytics."""
+        rows = db_access.fetch_trade_analytics(1, test_db)
+        
+        assert len(rows) > 0
+        for row in rows:
+            expected = db_access.trade_analytics(row['trade_id'], test_db)
+            assert row['status'] == expected['status']
+            for field in ('total_bought', 'total_sold', 'avg_buy_price', 'avg_sell_price',
+                          'total_fees', 'realized_pnl', 'open_qty'):
+                assert row[field] == pytest.approx(expected[field])
+    
+    def test_get_symbols_and_tags_for_account(self, test_db):
+        """Test per-account symbol and tag lookups match the account's trades."""
+        trades = db_access.fetch_trades_for_account(1, test_db)
+        expected_symbols = sorted({t['asset_symbol'] for t in trades})
+        expected_tags = set()
+        for t in trades:
+            # Normalized tags win; the legacy comma-separated column is the fallback
+            normalized = db_access.get_tags_for_trade(t['id'], test_db)
+            legacy = [tag.strip() for tag in t['tags'].split(',')] if t.get('tags') else []
+            expected_tags.update(normalized or legacy)
+        expected_tags = sorted(expected_tags)
+
+        assert db_access.get_symbols_for_account(1, test_db) == expected_symbols
+        assert db_access.get_tags_for_account(1, test_db) == expected_tags
+        assert set(expected_symbols) <= set(db_access.get_symbols_for_account(None, test_db))
+
+    def test_get_filter_lookups_matches_individual_lookups(self, test_db):
+        """Test the combined filter lookup agrees with the separate symbol and tag lookups."""
+        for account_id in (1, None):
+            lookups = db_access.get_filter_lookups(account_id, test_db)
+            assert lookups == {
+                'symbols': db_access.get_symbols_for_account(account_id, test_db),
+                'tags': db_access.get_tags_for_account(account_id, test_db),
+            }
+
     def test_insert_trade(self, test_db, sample_trade_data):
         """Test inserting a new trade."""
         trade_id = db_access.insert_trade(
@@ -0,0 +1,32 @@
+"""
+Unit tests for chart downsampling.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from utils.downsample import lttb
+
+
+@pytest.mark.unit
+class TestLTTB:
+    """Test Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_returns_all_points_when_small(self):
+        """Test no reduction happens when the series already fits."""
+        np.testing.assert_array_equal(lttb(np.arange(5), np.arange(5.0), 10), np.arange(5))
+
+    def test_keeps_endpoints_and_size(self):
+        """Test the output size, endpoints and ordering."""
+        x = pd.date_range('2024-01-01', periods=10000, freq='h').to_numpy()
+        y = np.cumsum(np.random.default_rng(0).normal(size=10000))
+        idx = lttb(x, y, 300)
+
+        assert len(idx) == 300
+        assert idx[0] == 0 and idx[-1] == 9999
+        assert np.all(np.diff(idx) > 0)
+
+    def test_keeps_spike(self):
+        """Test a single extreme point survives downsampling."""
+        y = np.zeros(1000)
+        y[517] = 100.0
+        assert 517 in lttb(np.arange(1000), y, 50)
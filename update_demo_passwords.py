@@ -5,7 +5,7 @@ Update demo users with proper password hashes for login testing.
 
 import sqlite3
 from pathlib import Path
-from auth import hash_password
+from auth import hash_password, needs_rehash
 
 def update_demo_passwords():
     """Update alice and bob with hashed passwords."""
@@ -27,8 +27,8 @@ def update_demo_passwords():
             if user_row:
                 user_id, current_hash = user_row
                 
-                # Update password hash if it's not properly formatted
-                if not current_hash or ':' not in current_hash:
+                # Update password hash if it's missing, legacy SHA-256 or outdated Argon2
+                if needs_rehash(current_hash):
                     new_hash = hash_password(password)
                     cursor.execute(
                         "UPDATE users SET password_hash = ? WHERE id = ?",
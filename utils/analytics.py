@@ -0,0 +1,114 @@
+"""
+Array analytics for Trade Craft.
+
+Provides NumPy kernels used by the dashboard charts and metrics so the hot paths
+run over contiguous float64 buffers instead of boxed pandas Series.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def cumulative_pnl(pnl: np.ndarray, order: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return the running P&L total, NaN entries counting as zero, optionally in the given order."""
+    pnl = np.asarray(pnl, dtype=np.float64)
+    # Gather (or copy) once, then zero NaNs and accumulate in that same buffer
+    buf = pnl[order] if order is not None else pnl.copy()
+    np.nan_to_num(buf, copy=False)
+    return np.cumsum(buf, out=buf)
+
+
+def equity_drawdown(pnl: np.ndarray, order: Optional[np.ndarray] = None
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the equity curve, its running peak and the drawdown from that peak.
+
+    Args:
+        pnl: Per-trade P&L values; NaN entries contribute nothing
+        order: Optional index array giving the chronological order of the trades
+
+    Returns:
+        Tuple of (cumulative P&L, running peak, drawdown) arrays, drawdown <= 0
+    """
+    cum = cumulative_pnl(pnl, order)
+    peak = np.maximum.accumulate(cum)
+    return cum, peak, cum - peak
+
+
+def max_drawdown(pnl: np.ndarray) -> float:
+    """Return the largest peak-to-trough decline of the cumulative P&L as a positive number."""
+    if len(pnl) == 0:
+        return 0.0
+    cum = cumulative_pnl(pnl)
+    # In-place ufuncs keep this to a single scratch buffer beside the cumulative sum
+    peak = np.maximum.accumulate(cum)
+    np.subtract(peak, cum, out=peak)
+    return float(peak.max())
+
+
+def return_volatility_ratio(pnl: np.ndarray) -> float:
+    """Return mean P&L divided by its sample standard deviation, ignoring NaNs (0 if undefined)."""
+    pnl = np.asarray(pnl, dtype=np.float64)
+    pnl = pnl[~np.isnan(pnl)]
+    if len(pnl) < 2:
+        return 0.0
+    std = pnl.std(ddof=1)
+    return float(pnl.mean() / std) if std > 0 else 0.0
+
+
+def monthly_totals(dates: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum values per calendar month with a single bincount over month ordinals.
+
+    Args:
+        dates: datetime64 timestamps, one per value (no NaT)
+        values: Values to total, aligned with dates
+
+    Returns:
+        Tuple of (months present as datetime64[M], monthly totals), in chronological order
+    """
+    months = np.asarray(dates).astype('datetime64[M]').astype(np.int64)
+    if len(months) == 0:
+        return np.array([], dtype='datetime64[M]'), np.array([], dtype=np.float64)
+    first = months.min()
+    key = months - first
+    totals = np.bincount(key, weights=np.asarray(values, dtype=np.float64))
+    present = np.flatnonzero(np.bincount(key))
+    return (present + first).astype('datetime64[M]'), totals[present]
+
+
+def histogram_bars(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bin values server-side so a chart only needs one bar per bin.
+
+    Args:
+        values: Values to bin; NaNs are ignored
+        bins: Number of equal-width bins
+
+    Returns:
+        Tuple of (bin centers, counts, bin widths)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, counts, np.diff(edges)
+
+
+def weekday_totals(dates: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum values per day of week with a single bincount.
+
+    Args:
+        dates: datetime64 timestamps, one per value (no NaT)
+        values: Values to total, aligned with dates; NaNs count as zero
+
+    Returns:
+        Tuple of (weekdays present, Monday=0, totals), in weekday order
+    """
+    days = np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday
+    weekday = (days + 3) % 7
+    totals = np.bincount(weekday, weights=np.nan_to_num(np.asarray(values, dtype=np.float64)),
+                         minlength=7)
+    present = np.flatnonzero(np.bincount(weekday, minlength=7))
+    return present, totals[present]
@@ -1,13 +1,15 @@
 import sqlite3
+from contextlib import closing
 
-con = sqlite3.connect('data/tradecraft.db')
-cur = con.cursor()
-print('weekday n')
-rows = list(cur.execute("SELECT strftime('%w', opened_at) as weekday, COUNT(*) as n FROM trades GROUP BY weekday ORDER BY weekday;"))
-for row in rows:
-    print(f'{row[0]} {row[1]}')
-print('Total trades:', cur.execute('SELECT COUNT(*) FROM trades').fetchone()[0])
-print('Sample opened_at values:')
-for row in cur.execute("SELECT opened_at FROM trades ORDER BY opened_at LIMIT 5;"):
-    print(row[0])
-con.close()
+# closing() guarantees the connection is released even if a query raises
+with closing(sqlite3.connect('data/tradecraft.db')) as con:
+    cur = con.cursor()
+    print('weekday n')
+    # Per-weekday counts and the overall total in one grouped scan (window over the groups)
+    rows = list(cur.execute("SELECT strftime('%w', opened_at) as weekday, COUNT(*) as n, SUM(COUNT(*)) OVER () as total FROM trades GROUP BY weekday ORDER BY weekday;"))
+    for row in rows:
+        print(f'{row[0]} {row[1]}')
+    print('Total trades:', rows[0][2] if rows else 0)
+    print('Sample opened_at values:')
+    for row in cur.execute("SELECT opened_at FROM trades ORDER BY opened_at LIMIT 5;"):
+        print(row[0])
@@ -0,0 +1,32 @@
+"""
+Timestamp parsing utilities for Trade Craft.
+
+Trade timestamps are stored as ISO strings; parsing them is done once per
+distinct value rather than once per row.
+"""
+
+import pandas as pd
+
+
+def to_datetime_cached(s: pd.Series) -> pd.Series:
+    """
+    Parse timestamp strings once per distinct value; datetime columns pass through.
+
+    Args:
+        s: Series of timestamp strings (or already-parsed datetimes)
+
+    Returns:
+        Datetime Series aligned with s; unparseable values become NaT
+    """
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    codes, uniques = pd.factorize(s)
+    try:
+        # Explicit format skips per-call format inference
+        parsed = pd.to_datetime(uniques, format='ISO8601', errors='coerce')
+    except ValueError:
+        # Offset-aware and naive strings mixed: errors='coerce' does not cover that, so
+        # infer the format from the first value and coerce the rest, as a plain
+        # to_datetime of the column would (uniques keep first-appearance order)
+        parsed = pd.to_datetime(uniques, errors='coerce')
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=s.index, name=s.name)
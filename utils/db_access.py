@@ -6,10 +6,16 @@ Provides type-annotated functions for querying and manipulating trades and trade
 
 import sqlite3
 import os
+import threading
 from pathlib import Path
 from typing import Any, List, Dict, Optional
 from datetime import datetime
 
+from utils.db_init import tune_connection
+
+# Per-thread cache of open connections, keyed by database path
+_local = threading.local()
+
 def get_db_path() -> Path:
     """Get the database path from configuration, checking environment variables."""
     return Path(os.getenv("DB_PATH", os.getenv("DATABASE_PATH", "data/tradecraft.db")))
@@ -20,12 +26,34 @@ def get_connection(db_path: Optional[Path] = None) -> sqlite3.Connection:
     Args:
         db_path: Path to the SQLite database file. If None, uses configured path.
     Returns:
-        sqlite3.Connection object.
+        sqlite3.Connection object owned by the caller.
     """
     if db_path is None:
         db_path = get_db_path()
     return sqlite3.connect(db_path)
 
+def _cached_connection(db_path: Optional[Path] = None) -> sqlite3.Connection:
+    """
+    Return this thread's long-lived connection for db_path, opening it on first use.
+
+    Used by the helpers below so repeated calls skip the connect + PRAGMA setup.
+    A connection that was closed is replaced. Callers set row factories on their
+    cursors, never on the shared connection.
+    """
+    if db_path is None:
+        db_path = get_db_path()
+    connections = _local.__dict__.setdefault("connections", {})
+    key = str(db_path)
+    conn = connections.get(key)
+    if conn is not None:
+        try:
+            conn.total_changes  # raises ProgrammingError once the connection is closed
+        except sqlite3.ProgrammingError:
+            conn = None
+    if conn is None:
+        conn = connections[key] = tune_connection(sqlite3.connect(db_path))
+    return conn
+
 
 def fetch_trades_for_user(username: str, db_path: Optional[Path] = None) -> List[Dict[str, Any]]:
     """
@@ -36,11 +64,9 @@ def fetch_trades_for_user(username: str, db_path: Optional[Path] = None) -> List
     Returns:
         List of trade dictionaries.
     """
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute('''
             SELECT t.* FROM trades t
             JOIN users u ON t.user_id = u.id
@@ -59,11 +85,9 @@ def fetch_trades_for_account(account_id: int, db_path: Optional[Path] = None) ->
     Returns:
         List of trade dictionaries.
     """
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute('''
             SELECT * FROM trades
             WHERE account_id = ?
@@ -74,11 +98,9 @@ def fetch_trades_for_account(account_id: int, db_path: Optional[Path] = None) ->
 
 def fetch_trades_for_user_and_account(user_id: int, account_id: int, db_path: Optional[Path] = None) -> list[dict]:
     """Fetch all trades for a given user_id and account_id."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute('''
             SELECT * FROM trades
             WHERE user_id = ? AND account_id = ?
@@ -99,11 +121,9 @@ def fetch_all_trades(db_path: Optional[Path] = None) -> List[Dict[str, Any]]:
     Returns:
         List of trade dictionaries.
     """
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute('''
             SELECT * FROM trades
             ORDER BY opened_at DESC
@@ -120,11 +140,9 @@ def fetch_legs_for_trade(trade_id: int, db_path: Optional[Path] = None) -> List[
     Returns:
         List of trade leg dictionaries.
     """
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute('''
             SELECT * FROM trade_legs
             WHERE trade_id = ?
@@ -142,9 +160,7 @@ def is_trade_open(trade_id: int, db_path: Optional[Path] = None) -> bool:
     Returns:
         True if trade is open, False otherwise.
     """
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('''
             SELECT action, SUM(quantity) as qty FROM trade_legs
@@ -175,10 +191,8 @@ def insert_trade(user_id: int, account_id: int, asset_symbol: str, asset_type: s
     Returns:
         The new trade's ID.
     """
-    if db_path is None:
-        db_path = get_db_path()
     now = datetime.now().isoformat()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('''
             INSERT INTO trades (user_id, account_id, asset_symbol, asset_type, opened_at, notes, tags, created_at, updated_at)
@@ -232,10 +246,8 @@ def insert_trade_leg(trade_id: int, action: str, quantity: int, price: float, fe
     Returns:
         The new trade leg's ID.
     """
-    if db_path is None:
-        db_path = get_db_path()
     now = datetime.now().isoformat()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('''
             INSERT INTO trade_legs (trade_id, action, quantity, price, fees, executed_at, notes, created_at, updated_at)
@@ -281,14 +293,18 @@ def trade_analytics(trade_id: int, db_path: Optional[Path] = None) -> Dict[str,
     Returns:
         Dictionary with analytics: total_bought, total_sold, avg_buy_price, avg_sell_price, total_fees, realized_pnl, open_qty, status.
     """
-    if db_path is None:
-        db_path = get_db_path()
     legs = fetch_legs_for_trade(trade_id, db_path)
     total_bought = sum(l['quantity'] for l in legs if l['action'] in ("buy", "buy to open"))
     total_sold = sum(l['quantity'] for l in legs if l['action'] in ("sell", "sell to close"))
     buy_amount = sum(l['quantity'] * l['price'] for l in legs if l['action'] in ("buy", "buy to open"))
     sell_amount = sum(l['quantity'] * l['price'] for l in legs if l['action'] in ("sell", "sell to close"))
     total_fees = sum(l['fees'] for l in legs)
+    return _summarize_trade(trade_id, total_bought, total_sold, buy_amount, sell_amount, total_fees)
+
+
+def _summarize_trade(trade_id: int, total_bought: float, total_sold: float, buy_amount: float,
+                     sell_amount: float, total_fees: float) -> Dict[str, Any]:
+    """Derive average prices, realized P&L, open quantity and status from leg totals."""
     avg_buy_price = (buy_amount / total_bought) if total_bought else 0.0
     avg_sell_price = (sell_amount / total_sold) if total_sold else 0.0
     realized_pnl = sell_amount - buy_amount - total_fees
@@ -317,11 +333,39 @@ def trade_analytics(trade_id: int, db_path: Optional[Path] = None) -> Dict[str,
     }
 
 
+def fetch_trade_analytics(account_id: Optional[int] = None, db_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    Calculate trade_analytics() for many trades with one grouped query.
+    Args:
+        account_id: Only include trades in this account. If None, includes all trades.
+        db_path: Path to the SQLite database file.
+    Returns:
+        List of analytics dictionaries (same keys as trade_analytics), one per trade.
+    """
+    query = '''
+        SELECT t.id,
+            COALESCE(SUM(CASE WHEN l.action IN ('buy', 'buy to open') THEN l.quantity END), 0),
+            COALESCE(SUM(CASE WHEN l.action IN ('sell', 'sell to close') THEN l.quantity END), 0),
+            COALESCE(SUM(CASE WHEN l.action IN ('buy', 'buy to open') THEN l.quantity * l.price END), 0),
+            COALESCE(SUM(CASE WHEN l.action IN ('sell', 'sell to close') THEN l.quantity * l.price END), 0),
+            COALESCE(SUM(l.fees), 0)
+        FROM trades t
+        LEFT JOIN trade_legs l ON l.trade_id = t.id
+    '''
+    params: list[Any] = []
+    if account_id is not None:
+        query += ' WHERE t.account_id = ?'
+        params.append(account_id)
+    query += ' GROUP BY t.id'
+    with _cached_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        return [_summarize_trade(*row) for row in cur.fetchall()]
+
+
 def get_tags_for_trade(trade_id: int, db_path: Optional[Path] = None) -> list[str]:
     """Return a list of tag names for a given trade."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('''
             SELECT tags.name FROM tags
@@ -333,9 +377,7 @@ def get_tags_for_trade(trade_id: int, db_path: Optional[Path] = None) -> list[st
 
 def get_all_tags(db_path: Optional[Path] = None) -> list[str]:
     """Return all unique tag names in the system."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('SELECT name FROM tags ORDER BY name')
         return [row[0] for row in cur.fetchall()]
@@ -343,9 +385,7 @@ def get_all_tags(db_path: Optional[Path] = None) -> list[str]:
 
 def set_tags_for_trade(trade_id: int, tags: list[str], db_path: Optional[Path] = None) -> None:
     """Set the tags for a trade, replacing any existing tags."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         # Remove existing
         cur.execute('DELETE FROM trade_tags WHERE trade_id = ?', (trade_id,))
@@ -365,9 +405,7 @@ def set_tags_for_trade(trade_id: int, tags: list[str], db_path: Optional[Path] =
 
 def get_symbols_for_trade(trade_id: int, db_path: Optional[Path] = None) -> list[str]:
     """Return a list of symbols for a given trade."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('''
             SELECT symbols.symbol FROM symbols
@@ -379,19 +417,83 @@ def get_symbols_for_trade(trade_id: int, db_path: Optional[Path] = None) -> list
 
 def get_all_symbols(db_path: Optional[Path] = None) -> list[str]:
     """Return all unique symbols in the system."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('SELECT symbol FROM symbols ORDER BY symbol')
         return [row[0] for row in cur.fetchall()]
 
 
+def _fetch_account_symbols(cur: sqlite3.Cursor, account_id: Optional[int]) -> list[str]:
+    """Run the distinct-symbol lookup for an account on an open cursor."""
+    query = 'SELECT DISTINCT asset_symbol FROM trades WHERE asset_symbol IS NOT NULL'
+    params: list = []
+    if account_id:
+        query += ' AND account_id = ?'
+        params.append(account_id)
+    cur.execute(query + ' ORDER BY asset_symbol', params)
+    return [row[0] for row in cur.fetchall()]
+
+
+def _fetch_account_tags(cur: sqlite3.Cursor, account_id: Optional[int]) -> list[str]:
+    """Run the distinct-tag lookup for an account on an open cursor."""
+    account_filter = ' AND t.account_id = ?' if account_id else ''
+    params = [account_id] if account_id else []
+    cur.execute(f'''
+        SELECT DISTINCT tags.name FROM trade_tags tt
+        JOIN tags ON tags.id = tt.tag_id
+        JOIN trades t ON t.id = tt.trade_id
+        WHERE 1 = 1{account_filter}
+    ''', params)
+    names = {row[0] for row in cur.fetchall()}
+    cur.execute(f'''
+        SELECT DISTINCT t.tags FROM trades t
+        WHERE t.tags IS NOT NULL AND t.tags != ''{account_filter}
+          AND NOT EXISTS (SELECT 1 FROM trade_tags tt WHERE tt.trade_id = t.id)
+    ''', params)
+    for (legacy,) in cur.fetchall():
+        names.update(tag.strip() for tag in legacy.split(','))
+    return sorted(names)
+
+
+def get_symbols_for_account(account_id: Optional[int] = None, db_path: Optional[Path] = None) -> list[str]:
+    """Return the distinct trade symbols for an account (all accounts if account_id is falsy)."""
+    with _cached_connection(db_path) as conn:
+        return _fetch_account_symbols(conn.cursor(), account_id)
+
+
+def get_tags_for_account(account_id: Optional[int] = None, db_path: Optional[Path] = None) -> list[str]:
+    """
+    Return the distinct tag names used by an account's trades (all accounts if account_id is falsy).
+
+    Normalized trade_tags are used where a trade has them; otherwise the legacy
+    comma-separated trades.tags column is split, matching how trades are loaded.
+    """
+    with _cached_connection(db_path) as conn:
+        return _fetch_account_tags(conn.cursor(), account_id)
+
+
+def get_filter_lookups(account_id: Optional[int] = None, db_path: Optional[Path] = None) -> Dict[str, list[str]]:
+    """
+    Return the symbol and tag filter options for an account in one database call.
+
+    Args:
+        account_id: Account to restrict to (all accounts if falsy)
+        db_path: Optional database path
+
+    Returns:
+        Dict with sorted "symbols" and "tags" lists
+    """
+    with _cached_connection(db_path) as conn:
+        cur = conn.cursor()
+        return {
+            'symbols': _fetch_account_symbols(cur, account_id),
+            'tags': _fetch_account_tags(cur, account_id),
+        }
+
+
 def set_symbols_for_trade(trade_id: int, symbols: list[str], db_path: Optional[Path] = None) -> None:
     """Set the symbols for a trade, replacing any existing symbols."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         # Remove existing
         cur.execute('DELETE FROM trade_symbols WHERE trade_id = ?', (trade_id,))
@@ -411,9 +513,7 @@ def set_symbols_for_trade(trade_id: int, symbols: list[str], db_path: Optional[P
 
 def get_all_users(db_path: Optional[Path] = None) -> list[dict]:
     """Return all users as a list of dicts with id and username."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('SELECT id, username FROM users ORDER BY username')
         return [{"id": row[0], "username": row[1]} for row in cur.fetchall()]
@@ -421,9 +521,7 @@ def get_all_users(db_path: Optional[Path] = None) -> list[dict]:
 
 def get_accounts_for_user(user_id: int, db_path: Optional[Path] = None) -> list[dict]:
     """Return all accounts for a user as a list of dicts with id, name, broker."""
-    if db_path is None:
-        db_path = get_db_path()
-    with get_connection(db_path) as conn:
+    with _cached_connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute('SELECT id, name, broker FROM accounts WHERE user_id = ? ORDER BY name', (user_id,))
         return [{"id": row[0], "name": row[1], "broker": row[2]} for row in cur.fetchall()]
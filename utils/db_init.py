@@ -10,6 +10,15 @@ from typing import Any
 
 DB_PATH = Path("data/tradecraft.db")
 
+# Per-connection settings: WAL lets readers run alongside the writer and
+# synchronous=NORMAL drops the extra fsync per commit that FULL requires.
+CONNECTION_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+)
+
 
 def get_connection(db_path: Path = DB_PATH) -> sqlite3.Connection:
     """Get a SQLite connection to the database."""
@@ -17,9 +26,18 @@ def get_connection(db_path: Path = DB_PATH) -> sqlite3.Connection:
     return sqlite3.connect(db_path)
 
 
+def tune_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply the standard PRAGMAs to a freshly opened connection and return it."""
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+
 def create_schema(conn: sqlite3.Connection) -> None:
     """Create tables for users, trades, trade_legs, tags, trade_tags, symbols, and trade_symbols if they do not exist."""
     cur = conn.cursor()
+    # WAL mode is persistent, so every later connection to this file inherits it
+    cur.execute('PRAGMA journal_mode=WAL')
     cur.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -105,11 +123,20 @@ def create_schema(conn: sqlite3.Connection) -> None:
             FOREIGN KEY(symbol_id) REFERENCES symbols(id) ON DELETE CASCADE
         )
     ''')
+    create_indexes(conn)
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    """Create lookup indexes if they do not exist (safe to call on existing databases)."""
+    cur = conn.cursor()
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_accounts_user_id ON accounts(user_id)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_trades_user_id ON trades(user_id)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_trades_asset_symbol ON trades(asset_symbol)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_trade_legs_trade_id ON trade_legs(trade_id)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_tags_name ON tags(name)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_trade_tags_trade_id ON trade_tags(trade_id)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_trade_tags_tag_id ON trade_tags(tag_id)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_symbols_symbol ON symbols(symbol)')
     cur.execute('CREATE INDEX IF NOT EXISTS idx_trade_symbols_trade_id ON trade_symbols(trade_id)')
     conn.commit()